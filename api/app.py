@@ -1,53 +1,251 @@
-import io
-import json
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import date, datetime
 from functools import lru_cache
-from pathlib import Path
 
 import duckdb
-import joblib
+import numpy as np
 import pandas as pd
-from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import StreamingResponse
+import pyarrow as pa
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+
+from api.batcher import MissingFeaturesError, PredictBatcher, missing_features
+from api.db import close_pools, get_pool
+from api.export import FILE_EXTENSIONS, MEDIA_TYPES, encode, open_stream, stream_batches
+from api.metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    observe_request,
+    observe_rows,
+    render as render_metrics,
+    set_endpoint,
+    stage,
+    timed_connection,
+)
+from api.pagination import KEYSET_ORDER, keyset_clause, keyset_order, next_cursor
+from api.registry import ModelRegistry
+from api.serialization import SHAPE_PATTERN, compress_stream, negotiate_encoding, render_frame
+from ingestion.airports_ref import load_airports
+from ingestion.spatial import GridIndex
 
 
 DEFAULT_DB = "data/analytics.duckdb"
 DEFAULT_TABLE = "mart_flight_features"
-DEFAULT_MODEL = "ml/artifacts/model.joblib"
-DEFAULT_FEATURES = "ml/artifacts/features.json"
+DB_PATH = os.environ.get("API_DB_PATH", DEFAULT_DB)
+MODEL_DIR = os.environ.get("API_MODEL_DIR", "ml/artifacts")
+MODEL_POLL_S = float(os.environ.get("API_MODEL_POLL_S", "10"))
+PREDICTIONS_TABLE = "flight_predictions"
+AIRPORT_STATS_TABLE = "mart_airport_stats"
+AIRPORT_DAILY_TABLE = "mart_airport_daily_stats"
+AIRPORT_HOURLY_TABLE = "feat_airport_hourly_traffic"
+DB_POOL_SIZE = int(os.environ.get("API_DB_POOL_SIZE", "4"))
+DB_IDLE_S = float(os.environ.get("API_DB_IDLE_S", "300"))
+AIRPORTS_FILE = os.environ.get("API_AIRPORTS_FILE", "data/reference/airports_eu.csv")
+NEAREST_CELL_DEG = 1.0
+
+FLIGHT_COLUMNS = [
+    "flight_id",
+    "icao24",
+    "callsign",
+    "flight_type",
+    "airport_icao",
+    "est_departure_airport",
+    "est_arrival_airport",
+    "event_hour_utc",
+    "route_code",
+    "flight_duration_min",
+]
+FLIGHT_SELECT = ", ".join(FLIGHT_COLUMNS)
+PREDICTION_COLUMNS = [
+    "icao24",
+    "callsign",
+    "flight_type",
+    "airport_icao",
+    "event_hour_utc",
+    "route_code",
+]
+EXPORT_FORMAT_PATTERN = "^(csv|ndjson|arrow)$"
+
+registry = ModelRegistry(MODEL_DIR, poll_interval=MODEL_POLL_S)
+batcher = PredictBatcher(
+    registry,
+    max_batch_rows=int(os.environ.get("PREDICT_BATCH_MAX_SIZE", "2048")),
+    max_wait_ms=float(os.environ.get("PREDICT_BATCH_MAX_WAIT_MS", "5")),
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    registry.start()
+    batcher.start()
+    yield
+    await batcher.stop()
+    registry.stop()
+    close_pools()
+
+
+async def track_endpoint(request: Request):
+    set_endpoint(request.scope["route"].path)
+
+
+app = FastAPI(
+    title="Open Data Air Traffic API",
+    lifespan=lifespan,
+    dependencies=[Depends(track_endpoint)],
+)
+
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    observe_request(
+        route.path if route else "unmatched",
+        request.method,
+        response.status_code,
+        time.perf_counter() - started,
+    )
+    return response
 
-app = FastAPI(title="Open Data Air Traffic API")
 
+def current_model():
+    try:
+        return registry.current()
+    except FileNotFoundError:
+        raise HTTPException(status_code=503, detail="Model not found. Train it first.")
 
-@lru_cache(maxsize=1)
-def load_model(model_path: str):
-    path = Path(model_path)
-    if not path.exists():
-        raise FileNotFoundError(model_path)
-    return joblib.load(path)
 
+def current_version():
+    loaded = registry.current_or_none()
+    return loaded.version if loaded else None
 
-def load_feature_config(features_path: str) -> dict:
-    path = Path(features_path)
-    if not path.exists():
-        return {}
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
 
+def db_pool():
+    return get_pool(DB_PATH, size=DB_POOL_SIZE, idle_timeout=DB_IDLE_S)
+
+
+def database_unavailable(exc: Exception) -> HTTPException:
+    if isinstance(exc, FileNotFoundError):
+        return HTTPException(status_code=503, detail="Database not found. Run dbt first.")
+    return HTTPException(
+        status_code=503,
+        detail="Database locked by a writer (dbt, ml/score.py). Retry shortly.",
+        headers={"Retry-After": "5"},
+    )
 
-def load_data(db_path: str, table: str, limit: int) -> pd.DataFrame:
-    con = duckdb.connect(db_path, read_only=True)
+
+def query_df(sql: str, params=()) -> pd.DataFrame:
     try:
-        df = con.execute(
-            f"""
-            select *
-            from {table}
-            order by event_hour_utc desc
-            limit {limit}
-            """
-        ).fetchdf()
-    finally:
-        con.close()
-    return df
+        with timed_connection(db_pool()) as con:
+            with stage("query"):
+                return con.execute(sql, params).fetchdf()
+    except (FileNotFoundError, duckdb.IOException) as exc:
+        raise database_unavailable(exc)
+
+
+def load_data(limit: int, filters=("", [])) -> pd.DataFrame:
+    where_clause, params = filters
+    return query_df(
+        f"""
+        select *
+        from {DEFAULT_TABLE}
+        {where_clause}
+        order by {KEYSET_ORDER}
+        limit ?
+        """,
+        params + [limit],
+    )
+
+
+def flight_filters(
+    airport_icao: str | None = None,
+    flight_type: str | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    icao24: str | None = None,
+    cursor: str | None = None,
+):
+    where = []
+    params = []
+    if airport_icao:
+        where.append("airport_icao = ?")
+        params.append(airport_icao.upper())
+    if flight_type:
+        where.append("flight_type = ?")
+        params.append(flight_type)
+    if icao24:
+        where.append("icao24 = ?")
+        params.append(icao24.lower())
+    if start:
+        where.append("event_hour_utc >= ?")
+        params.append(start)
+    if end:
+        where.append("event_hour_utc < ?")
+        params.append(end)
+    if cursor:
+        try:
+            clause, cursor_params = keyset_clause(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+        where.append(clause)
+        params.extend(cursor_params)
+    where_clause = f"where {' and '.join(where)}" if where else ""
+    return where_clause, params
+
+
+def load_scored_data(limit: int, model_version: str | None, filters=("", [])) -> pd.DataFrame:
+    where_clause, params = filters
+    if model_version:
+        try:
+            return query_df(
+                f"""
+                select m.*, p.prediction as stored_prediction, p.prediction_label as stored_label
+                from (select * from {DEFAULT_TABLE} {where_clause}) m
+                left join {PREDICTIONS_TABLE} p
+                    on p.flight_id = m.flight_id
+                   and p.model_version = ?
+                order by {keyset_order("m")}
+                limit ?
+                """,
+                params + [model_version, limit],
+            )
+        except duckdb.CatalogException:
+            pass
+    return load_data(limit, filters)
+
+
+def stored_predictions(df: pd.DataFrame):
+    stored = df.pop("stored_prediction") if "stored_prediction" in df.columns else None
+    labels = df.pop("stored_label") if "stored_label" in df.columns else None
+    if labels is None or labels.isna().all():
+        return stored
+    loaded = registry.current_or_none()
+    classes = getattr(loaded.model, "classes_", None) if loaded else None
+    if classes is None:
+        return None
+    return labels.map({str(label): label for label in classes.tolist()})
+
+
+def score_rows(df: pd.DataFrame):
+    stored = stored_predictions(df)
+    missing = stored.isna() if stored is not None else pd.Series(True, index=df.index)
+    if not missing.any():
+        return stored.to_numpy()
+
+    loaded = current_model()
+    model = loaded.model
+    feature_cols = [c for c in loaded.feature_cols if c in df.columns]
+    if not feature_cols:
+        raise HTTPException(status_code=400, detail="No feature columns available.")
+
+    with stage("inference"):
+        if missing.all():
+            return model.predict(df[feature_cols])
+        preds = stored.astype(object if stored.dtype == object else float)
+        preds[missing] = model.predict(df.loc[missing, feature_cols])
+    return preds.to_numpy()
 
 
 @app.get("/health")
@@ -57,217 +255,381 @@ def health():
 
 @app.get("/predictions")
 def predictions(
+    request: Request,
     limit: int = Query(100, ge=1, le=10000),
-    db_path: str = DEFAULT_DB,
-    table: str = DEFAULT_TABLE,
-    model_path: str = DEFAULT_MODEL,
-    features_path: str = DEFAULT_FEATURES,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    cursor: str | None = None,
+    shape: str = Query("records", pattern=SHAPE_PATTERN),
 ):
-    try:
-        model = load_model(model_path)
-    except FileNotFoundError:
-        raise HTTPException(status_code=503, detail="Model not found. Train it first.")
+    filters = flight_filters(start=start, end=end, cursor=cursor)
+    df = load_scored_data(limit + 1, current_version(), filters)
+    df, cursor_out = next_cursor(df, limit)
 
-    df = load_data(db_path, table, limit)
+    out = df[PREDICTION_COLUMNS].copy()
     if df.empty:
-        return {"count": 0, "predictions": []}
+        out["prediction"] = pd.Series(dtype="float64")
+    else:
+        out["prediction"] = score_rows(df.copy())
+    observe_rows(len(out))
+    meta = {"count": len(out), "next_cursor": cursor_out}
+    return render_frame(request, out, "predictions", meta, shape)
+
+
+def payload_frame(payload: dict) -> pd.DataFrame:
+    columns = payload.get("columns")
+    if columns is not None:
+        if not isinstance(columns, dict) or not columns:
+            raise HTTPException(status_code=400, detail="'columns' must be a non-empty object.")
+        if any(not isinstance(values, list) for values in columns.values()):
+            raise HTTPException(status_code=400, detail="Each column must be a list.")
+        if len({len(values) for values in columns.values()}) != 1:
+            raise HTTPException(status_code=400, detail="All columns must have the same length.")
+        return pd.DataFrame(columns)
 
-    feature_cfg = load_feature_config(features_path)
-    categorical = feature_cfg.get("categorical_features", [])
-    numeric = feature_cfg.get("numeric_features", [])
-    feature_cols = [c for c in (categorical + numeric) if c in df.columns]
-    if not feature_cols:
-        raise HTTPException(status_code=400, detail="No feature columns available.")
-
-    X = df[feature_cols]
-    preds = model.predict(X)
+    records = payload.get("records")
+    if not isinstance(records, list) or not records:
+        raise HTTPException(
+            status_code=400, detail="Payload must include non-empty 'records' list or 'columns'."
+        )
+    return pd.DataFrame.from_records(records)
 
-    out = df[
-        [
-            "icao24",
-            "callsign",
-            "flight_type",
-            "airport_icao",
-            "event_hour_utc",
-            "route_code",
-        ]
-    ].copy()
-    out["prediction"] = preds
-    out["event_hour_utc"] = pd.to_datetime(out["event_hour_utc"]).astype(str)
 
-    return {"count": len(out), "predictions": out.to_dict(orient="records")}
+def missing_features_error(missing) -> HTTPException:
+    return HTTPException(
+        status_code=422,
+        detail={"message": "Missing feature columns in payload.", "missing_features": missing},
+    )
 
 
 @app.post("/predict")
-def predict(
-    payload: dict,
-    model_path: str = DEFAULT_MODEL,
-    features_path: str = DEFAULT_FEATURES,
-):
+async def predict(payload: dict):
+    loaded = current_model()
+    df = payload_frame(payload)
+    if df.empty:
+        raise HTTPException(status_code=400, detail="Payload has no rows.")
+    missing = missing_features(df, loaded.feature_cols)
+    if missing:
+        raise missing_features_error(missing)
+
     try:
-        model = load_model(model_path)
+        version, preds = await batcher.submit(df)
     except FileNotFoundError:
         raise HTTPException(status_code=503, detail="Model not found. Train it first.")
+    except MissingFeaturesError as exc:
+        raise missing_features_error(exc.missing)
+    except (TypeError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid payload: {exc}")
+    observe_rows(len(df))
+    return {"count": len(df), "model_version": version, "predictions": preds.tolist()}
+
+
+@app.get("/models")
+def models():
+    return registry.versions()
+
+
+@app.get("/metrics")
+def metrics():
+    return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
+def prediction_batches(filters, limit: int | None):
+    where_clause, params = filters
+    limit_clause = "limit ?" if limit else ""
+    limit_params = [limit] if limit else []
+    queries = []
+    model_version = current_version()
+    if model_version:
+        queries.append(
+            (
+                f"""
+                select m.*, p.prediction as stored_prediction, p.prediction_label as stored_label
+                from (select * from {DEFAULT_TABLE} {where_clause}) m
+                left join {PREDICTIONS_TABLE} p
+                    on p.flight_id = m.flight_id
+                   and p.model_version = ?
+                order by {keyset_order("m")}
+                {limit_clause}
+                """,
+                params + [model_version] + limit_params,
+            )
+        )
+    queries.append(
+        (
+            f"""
+            select *
+            from {DEFAULT_TABLE}
+            {where_clause}
+            order by {KEYSET_ORDER}
+            {limit_clause}
+            """,
+            params + limit_params,
+        )
+    )
 
-    records = payload.get("records")
-    if not isinstance(records, list) or not records:
-        raise HTTPException(status_code=400, detail="Payload must include non-empty 'records' list.")
-
-    df = pd.DataFrame.from_records(records)
-    feature_cfg = load_feature_config(features_path)
-    categorical = feature_cfg.get("categorical_features", [])
-    numeric = feature_cfg.get("numeric_features", [])
-    feature_cols = [c for c in (categorical + numeric) if c in df.columns]
-    if not feature_cols:
-        raise HTTPException(status_code=400, detail="No feature columns available in payload.")
-
-    preds = model.predict(df[feature_cols])
-    return {"count": len(df), "predictions": preds.tolist()}
+    def transform(batch):
+        df = batch.to_pandas()
+        if df.empty:
+            df = df.drop(columns=["stored_prediction", "stored_label"], errors="ignore")
+            df["prediction"] = pd.Series(dtype="float64")
+        else:
+            df["prediction"] = score_rows(df)
+        return pa.RecordBatch.from_pandas(df, preserve_index=False)
+
+    return stream_batches(timed_connection(db_pool()), queries, transform=transform)
+
+
+def flight_batches(filters, limit: int | None):
+    where_clause, params = filters
+    limit_clause = "limit ?" if limit else ""
+    sql = f"""
+        select {FLIGHT_SELECT}
+        from {DEFAULT_TABLE}
+        {where_clause}
+        order by {KEYSET_ORDER}
+        {limit_clause}
+        """
+    return stream_batches(timed_connection(db_pool()), [(sql, params + ([limit] if limit else []))])
+
+
+def export_response(
+    request: Request,
+    batches,
+    export_format: str,
+    name: str,
+    empty_status: int | None = None,
+):
+    try:
+        first, batches = open_stream(batches)
+    except (FileNotFoundError, duckdb.IOException) as exc:
+        raise database_unavailable(exc)
+    if empty_status and first.num_rows == 0:
+        raise HTTPException(status_code=empty_status, detail="No data available.")
+    filename = f"{name}.{FILE_EXTENSIONS[export_format]}"
+    headers = {"Content-Disposition": f"attachment; filename={filename}", "Vary": "Accept-Encoding"}
+    body = encode(batches, export_format)
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    if encoding:
+        body = compress_stream(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return StreamingResponse(body, media_type=MEDIA_TYPES[export_format], headers=headers)
 
 
 @app.get("/predictions.csv")
 def predictions_csv(
-    limit: int = Query(100, ge=1, le=10000),
-    db_path: str = DEFAULT_DB,
-    table: str = DEFAULT_TABLE,
-    model_path: str = DEFAULT_MODEL,
-    features_path: str = DEFAULT_FEATURES,
+    request: Request,
+    limit: int = Query(100, ge=1),
 ):
-    try:
-        model = load_model(model_path)
-    except FileNotFoundError:
-        raise HTTPException(status_code=503, detail="Model not found. Train it first.")
+    batches = prediction_batches(flight_filters(), limit)
+    return export_response(request, batches, "csv", "predictions", empty_status=404)
 
-    df = load_data(db_path, table, limit)
-    if df.empty:
-        raise HTTPException(status_code=404, detail="No data available.")
 
-    feature_cfg = load_feature_config(features_path)
-    categorical = feature_cfg.get("categorical_features", [])
-    numeric = feature_cfg.get("numeric_features", [])
-    feature_cols = [c for c in (categorical + numeric) if c in df.columns]
-    if not feature_cols:
-        raise HTTPException(status_code=400, detail="No feature columns available.")
+@app.get("/predictions/export")
+def predictions_export(
+    request: Request,
+    format: str = Query("csv", pattern=EXPORT_FORMAT_PATTERN),
+    limit: int | None = Query(None, ge=1),
+    start: datetime | None = None,
+    end: datetime | None = None,
+    airport_icao: str | None = None,
+    flight_type: str | None = Query(None, pattern="^(arrival|departure)$"),
+):
+    filters = flight_filters(airport_icao, flight_type, start, end)
+    batches = prediction_batches(filters, limit)
+    return export_response(request, batches, format, "predictions")
+
+
+@app.get("/flights/export")
+def flights_export(
+    request: Request,
+    format: str = Query("csv", pattern=EXPORT_FORMAT_PATTERN),
+    limit: int | None = Query(None, ge=1),
+    start: datetime | None = None,
+    end: datetime | None = None,
+    airport_icao: str | None = None,
+    flight_type: str | None = Query(None, pattern="^(arrival|departure)$"),
+):
+    filters = flight_filters(airport_icao, flight_type, start, end)
+    batches = flight_batches(filters, limit)
+    return export_response(request, batches, format, "flights")
+
 
-    preds = model.predict(df[feature_cols])
-    out = df.copy()
-    out["prediction"] = preds
-    if "event_hour_utc" in out.columns:
-        out["event_hour_utc"] = pd.to_datetime(out["event_hour_utc"]).astype(str)
-
-    buffer = io.StringIO()
-    out.to_csv(buffer, index=False)
-    buffer.seek(0)
-    return StreamingResponse(
-        buffer,
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=predictions.csv"},
+def load_flights_page(request: Request, limit: int, filters, shape: str):
+    where_clause, params = filters
+    df = query_df(
+        f"""
+            select {FLIGHT_SELECT}
+            from {DEFAULT_TABLE}
+            {where_clause}
+            order by {KEYSET_ORDER}
+            limit ?
+            """,
+        params + [limit + 1],
     )
+    df, cursor_out = next_cursor(df, limit)
+    observe_rows(len(df))
+    return render_frame(request, df, "flights", {"count": len(df), "next_cursor": cursor_out}, shape)
 
 
 @app.get("/flights")
 def flights(
+    request: Request,
     limit: int = Query(100, ge=1, le=10000),
     airport_icao: str | None = None,
     flight_type: str | None = Query(None, pattern="^(arrival|departure)$"),
-    db_path: str = DEFAULT_DB,
-    table: str = DEFAULT_TABLE,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    cursor: str | None = None,
+    shape: str = Query("records", pattern=SHAPE_PATTERN),
 ):
-    where = []
-    if airport_icao:
-        where.append(f"airport_icao = '{airport_icao.upper()}'")
-    if flight_type:
-        where.append(f"flight_type = '{flight_type}'")
-    where_clause = f"where {' and '.join(where)}" if where else ""
-
-    con = duckdb.connect(db_path, read_only=True)
-    try:
-        df = con.execute(
-            f"""
-            select
-                icao24,
-                callsign,
-                flight_type,
-                airport_icao,
-                est_departure_airport,
-                est_arrival_airport,
-                event_hour_utc,
-                route_code,
-                flight_duration_min
-            from {table}
-            {where_clause}
-            order by event_hour_utc desc
-            limit {limit}
-            """
-        ).fetchdf()
-    finally:
-        con.close()
-
-    df["event_hour_utc"] = pd.to_datetime(df["event_hour_utc"]).astype(str)
-    return {"count": len(df), "flights": df.to_dict(orient="records")}
+    filters = flight_filters(airport_icao, flight_type, start, end, cursor=cursor)
+    return load_flights_page(request, limit, filters, shape)
 
 
 @app.get("/flights/{icao24}")
 def flights_by_icao24(
+    request: Request,
     icao24: str,
     limit: int = Query(100, ge=1, le=10000),
-    db_path: str = DEFAULT_DB,
-    table: str = DEFAULT_TABLE,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    cursor: str | None = None,
+    shape: str = Query("records", pattern=SHAPE_PATTERN),
 ):
-    con = duckdb.connect(db_path, read_only=True)
-    try:
-        df = con.execute(
-            f"""
-            select
-                icao24,
-                callsign,
-                flight_type,
-                airport_icao,
-                est_departure_airport,
-                est_arrival_airport,
-                event_hour_utc,
-                route_code,
-                flight_duration_min
-            from {table}
-            where icao24 = '{icao24.lower()}'
-            order by event_hour_utc desc
-            limit {limit}
-            """
-        ).fetchdf()
-    finally:
-        con.close()
+    filters = flight_filters(start=start, end=end, icao24=icao24, cursor=cursor)
+    return load_flights_page(request, limit, filters, shape)
 
-    if df.empty:
-        return {"count": 0, "flights": []}
 
-    df["event_hour_utc"] = pd.to_datetime(df["event_hour_utc"]).astype(str)
-    return {"count": len(df), "flights": df.to_dict(orient="records")}
+def query_stats(sql: str, params) -> pd.DataFrame:
+    try:
+        return query_df(sql, params)
+    except duckdb.CatalogException:
+        raise HTTPException(status_code=503, detail="Airport stats not built. Run dbt first.")
 
 
 @app.get("/airports")
 def airports(
+    request: Request,
     limit: int = Query(200, ge=1, le=5000),
-    db_path: str = DEFAULT_DB,
-    table: str = DEFAULT_TABLE,
+    shape: str = Query("records", pattern=SHAPE_PATTERN),
 ):
-    con = duckdb.connect(db_path, read_only=True)
-    try:
-        df = con.execute(
-            f"""
-            select
-                airport_icao,
-                count(*) as flights_count,
-                min(event_hour_utc) as first_seen,
-                max(event_hour_utc) as last_seen
-            from {table}
-            group by 1
+    df = query_stats(
+        f"""
+            select *
+            from {AIRPORT_STATS_TABLE}
             order by flights_count desc
-            limit {limit}
-            """
-        ).fetchdf()
-    finally:
-        con.close()
-
-    df["first_seen"] = pd.to_datetime(df["first_seen"]).astype(str)
-    df["last_seen"] = pd.to_datetime(df["last_seen"]).astype(str)
-    return {"count": len(df), "airports": df.to_dict(orient="records")}
+            limit ?
+            """,
+        [limit],
+    )
+
+    observe_rows(len(df))
+    return render_frame(request, df, "airports", {"count": len(df)}, shape)
+
+
+@lru_cache(maxsize=2)
+def airport_grid(airports):
+    located = airports.require("latitude", "longitude")
+    return located, GridIndex(located.latitude, located.longitude, NEAREST_CELL_DEG)
+
+
+def airport_index():
+    try:
+        airports = load_airports(AIRPORTS_FILE)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=503,
+            detail="Airport reference not found. Run ingestion/airports_fetch.py first.",
+        )
+    return airport_grid(airports)
+
+
+@app.get("/airports/nearest")
+def airports_nearest(
+    request: Request,
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    k: int = Query(5, ge=1, le=100),
+    max_km: float | None = Query(None, gt=0),
+    shape: str = Query("records", pattern=SHAPE_PATTERN),
+):
+    airports, index = airport_index()
+    with stage("query"):
+        found = index.nearest(lat, lon, k=k, max_km=max_km)
+    positions = np.array([position for position, _ in found], dtype=np.intp)
+    out = airports[positions].to_frame().assign(
+        distance_km=[round(distance, 3) for _, distance in found]
+    )
+
+    observe_rows(len(out))
+    meta = {"latitude": lat, "longitude": lon, "count": len(out)}
+    return render_frame(request, out, "airports", meta, shape)
+
+
+@app.get("/airports/{icao}/daily")
+def airport_daily(
+    request: Request,
+    icao: str,
+    start: date | None = None,
+    end: date | None = None,
+    limit: int = Query(366, ge=1, le=5000),
+    shape: str = Query("records", pattern=SHAPE_PATTERN),
+):
+    where = ["airport_icao = ?"]
+    params = [icao.upper()]
+    if start:
+        where.append("event_day_utc >= ?")
+        params.append(start)
+    if end:
+        where.append("event_day_utc <= ?")
+        params.append(end)
+
+    df = query_stats(
+        f"""
+            select * replace (strftime(event_day_utc, '%Y-%m-%d') as event_day_utc)
+            from {AIRPORT_DAILY_TABLE}
+            where {' and '.join(where)}
+            order by event_day_utc desc
+            limit ?
+            """,
+        params + [limit],
+    )
+
+    observe_rows(len(df))
+    meta = {"airport_icao": icao.upper(), "count": len(df)}
+    return render_frame(request, df, "days", meta, shape)
+
+
+@app.get("/airports/{icao}/hourly")
+def airport_hourly(
+    request: Request,
+    icao: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    limit: int = Query(168, ge=1, le=10000),
+    shape: str = Query("records", pattern=SHAPE_PATTERN),
+):
+    where = ["airport_icao = ?"]
+    params = [icao.upper()]
+    if start:
+        where.append("event_hour_utc >= ?")
+        params.append(start)
+    if end:
+        where.append("event_hour_utc < ?")
+        params.append(end)
+
+    df = query_stats(
+        f"""
+            select * replace (strftime(event_day_utc, '%Y-%m-%d') as event_day_utc)
+            from {AIRPORT_HOURLY_TABLE}
+            where {' and '.join(where)}
+            order by event_hour_utc desc
+            limit ?
+            """,
+        params + [limit],
+    )
+
+    observe_rows(len(df))
+    meta = {"airport_icao": icao.upper(), "count": len(df)}
+    return render_frame(request, df, "hours", meta, shape)
@@ -0,0 +1,124 @@
+import asyncio
+import time
+
+import pandas as pd
+
+from api.metrics import stage
+
+
+class MissingFeaturesError(ValueError):
+    def __init__(self, missing):
+        super().__init__("Missing feature columns: {}".format(", ".join(missing)))
+        self.missing = missing
+
+
+def missing_features(df: pd.DataFrame, feature_cols):
+    return [c for c in feature_cols if c not in df.columns]
+
+
+class PredictBatcher:
+    def __init__(self, registry, max_batch_rows: int = 2048, max_wait_ms: float = 5.0):
+        self.registry = registry
+        self.max_batch_rows = max_batch_rows
+        self.max_wait_s = max_wait_ms / 1000.0
+        self._queue = None
+        self._worker = None
+        self.batches = 0
+        self.requests = 0
+
+    def start(self):
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        self._queue = None
+
+    async def submit(self, df: pd.DataFrame):
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((df, future))
+        return await future
+
+    async def _collect(self):
+        items = [await self._queue.get()]
+        rows = len(items[0][0])
+        deadline = time.perf_counter() + self.max_wait_s
+        while rows < self.max_batch_rows:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            items.append(item)
+            rows += len(item[0])
+        return items
+
+    async def _run(self):
+        while True:
+            items = await self._collect()
+            items = [(df, future) for df, future in items if not future.cancelled()]
+            if not items:
+                continue
+            try:
+                results = await asyncio.to_thread(self._predict, [df for df, _ in items])
+            except Exception as exc:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            for (_, future), result in zip(items, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def _predict(self, frames):
+        loaded = self.registry.current()
+        cols = loaded.feature_cols
+        results = [None] * len(frames)
+        valid = []
+        for position, df in enumerate(frames):
+            missing = missing_features(df, cols)
+            if missing:
+                results[position] = MissingFeaturesError(missing)
+            else:
+                valid.append((position, df[cols]))
+        self.batches += 1
+        self.requests += len(frames)
+        if not valid:
+            return results
+        try:
+            with stage("inference", endpoint="/predict"):
+                preds = loaded.model.predict(
+                    pd.concat([df for _, df in valid], ignore_index=True, copy=False)
+                )
+        except Exception:
+            if len(frames) == 1:
+                raise
+            for position, df in valid:
+                results[position] = self._predict_one(loaded, df)
+            return results
+        offset = 0
+        for position, df in valid:
+            results[position] = (loaded.version, preds[offset : offset + len(df)])
+            offset += len(df)
+        return results
+
+    def _predict_one(self, loaded, df):
+        try:
+            return loaded.version, loaded.model.predict(df)
+        except Exception as exc:
+            return exc
@@ -0,0 +1,138 @@
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import duckdb
+
+
+def _file_signature(path: Path):
+    stat = path.stat()
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+class ConnectionPool:
+    def __init__(self, db_path: str, size: int = 4, timeout: float = 30.0, idle_timeout: float = 300.0):
+        self.db_path = str(db_path)
+        self.size = size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle = []
+        self._active = 0
+        self._checkouts = 0
+        self._generation = 0
+        self._signature = None
+
+    def _connect(self):
+        # One in-memory instance per slot with the file attached read-only: DuckDB caches
+        # instances by path, so a plain connect() would keep serving a replaced file.
+        con = duckdb.connect(":memory:")
+        escaped = self.db_path.replace("'", "''")
+        con.execute(f"attach '{escaped}' as analytics (read_only)")
+        con.execute("use analytics")
+        return con
+
+    def _check_replaced(self):
+        try:
+            signature = _file_signature(Path(self.db_path))
+        except FileNotFoundError:
+            if self._signature is None:
+                raise
+            return
+        with self._lock:
+            if signature == self._signature:
+                return
+            self._signature = signature
+            self._generation += 1
+            stale, self._idle = self._idle, []
+        for _, con in stale:
+            con.close()
+
+    def _checkout(self):
+        with self._lock:
+            self._active += 1
+            self._checkouts += 1
+            generation = self._generation
+            if self._idle:
+                return self._idle.pop()
+        try:
+            return generation, self._connect()
+        except BaseException:
+            with self._lock:
+                self._active -= 1
+            raise
+
+    def _checkin(self, item, broken: bool = False):
+        generation, con = item
+        with self._lock:
+            self._active -= 1
+            keep = not broken and generation == self._generation and self.idle_timeout > 0
+            if keep:
+                self._idle.append(item)
+                if self._active == 0:
+                    self._schedule_release(self._checkouts)
+                return
+        con.close()
+
+    def _schedule_release(self, checkouts: int):
+        timer = threading.Timer(self.idle_timeout, self._release_idle, args=(checkouts,))
+        timer.daemon = True
+        timer.start()
+
+    def _release_idle(self, checkouts: int):
+        # Closing every connection drops the read lock on the file so that dbt or
+        # ml/score.py can open it for writing between bursts of requests.
+        with self._lock:
+            if self._active or self._checkouts != checkouts:
+                return
+            stale, self._idle = self._idle, []
+        for _, con in stale:
+            con.close()
+
+    @contextmanager
+    def connection(self):
+        self._check_replaced()
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"No DuckDB connection available for {self.db_path}")
+        try:
+            item = self._checkout()
+            broken = False
+            try:
+                yield item[1]
+            except duckdb.Error:
+                broken = True
+                raise
+            finally:
+                self._checkin(item, broken)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        with self._lock:
+            stale, self._idle = self._idle, []
+            self._generation += 1
+        for _, con in stale:
+            con.close()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str, size: int = 4, idle_timeout: float = 300.0) -> ConnectionPool:
+    key = str(Path(db_path).resolve())
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(db_path, size=size, idle_timeout=idle_timeout)
+            _pools[key] = pool
+        return pool
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
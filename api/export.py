@@ -0,0 +1,99 @@
+import io
+import itertools
+
+import duckdb
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+from api.metrics import observe_rows, stage
+
+
+EXPORT_BATCH_SIZE = 50_000
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+FILE_EXTENSIONS = {"csv": "csv", "ndjson": "ndjson", "arrow": "arrows"}
+
+
+def stream_batches(connection, queries, batch_size: int = EXPORT_BATCH_SIZE, transform=None):
+    with connection as con:
+        reader = None
+        for index, (sql, params) in enumerate(queries):
+            try:
+                with stage("query"):
+                    reader = con.execute(sql, params).fetch_record_batch(batch_size)
+                break
+            except duckdb.CatalogException:
+                if index == len(queries) - 1:
+                    raise
+
+        rows = 0
+        batches = iter(reader)
+        while True:
+            with stage("query"):
+                batch = next(batches, None)
+            if batch is None:
+                break
+            if batch.num_rows == 0:
+                continue
+            rows += batch.num_rows
+            yield transform(batch) if transform else batch
+        observe_rows(rows)
+        if not rows:
+            empty = pa.RecordBatch.from_pylist([], schema=reader.schema)
+            yield transform(empty) if transform else empty
+
+
+def encode_csv(batches):
+    first = True
+    for batch in batches:
+        buffer = io.BytesIO()
+        with stage("serialization"):
+            pa_csv.write_csv(batch, buffer, write_options=pa_csv.WriteOptions(include_header=first))
+        first = False
+        yield buffer.getvalue()
+
+
+def encode_ndjson(batches):
+    for batch in batches:
+        if batch.num_rows == 0:
+            continue
+        with stage("serialization"):
+            body = batch.to_pandas().to_json(orient="records", lines=True, date_format="iso")
+            if not body.endswith("\n"):
+                body += "\n"
+            chunk = body.encode("utf-8")
+        yield chunk
+
+
+def encode_arrow(batches):
+    sink = io.BytesIO()
+    writer = None
+    for batch in batches:
+        with stage("serialization"):
+            if writer is None:
+                writer = pa.ipc.new_stream(sink, batch.schema)
+            if batch.num_rows:
+                writer.write_batch(batch)
+        chunk = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        if chunk:
+            yield chunk
+    if writer is not None:
+        writer.close()
+        yield sink.getvalue()
+
+
+ENCODERS = {"csv": encode_csv, "ndjson": encode_ndjson, "arrow": encode_arrow}
+
+
+def open_stream(batches):
+    first = next(batches)
+    return first, itertools.chain([first], batches)
+
+
+def encode(batches, export_format: str):
+    return ENCODERS[export_format](batches)
@@ -0,0 +1,117 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROW_BUCKETS = (0, 1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_endpoint = ContextVar("endpoint", default="other")
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value: float):
+        key = tuple(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [[0] * len(self.buckets), 0.0, 0]
+                self._series[key] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(k, list(v[0]), v[1], v[2]) for k, v in sorted(self._series.items())]
+        for key, counts, total, count in items:
+            labels = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(self.label_names, key))
+            prefix = labels + "," if labels else ""
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound:g}"}} {bucket_count}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_SECONDS = Histogram(
+    "api_request_seconds",
+    "End-to-end request latency (until the response headers are sent).",
+    ("endpoint", "method", "status"),
+    LATENCY_BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    "api_stage_seconds",
+    "Time spent per stage: db_open, query, inference, serialization (per batch for exports).",
+    ("endpoint", "stage"),
+    LATENCY_BUCKETS,
+)
+ROWS_RETURNED = Histogram(
+    "api_rows_returned",
+    "Rows returned per response.",
+    ("endpoint",),
+    ROW_BUCKETS,
+)
+HISTOGRAMS = [REQUEST_SECONDS, STAGE_SECONDS, ROWS_RETURNED]
+
+
+def set_endpoint(endpoint: str):
+    _endpoint.set(endpoint)
+
+
+def current_endpoint() -> str:
+    return _endpoint.get()
+
+
+def observe_stage(name: str, seconds: float, endpoint: str | None = None):
+    STAGE_SECONDS.observe((endpoint or _endpoint.get(), name), seconds)
+
+
+@contextmanager
+def stage(name: str, endpoint: str | None = None):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - started, endpoint)
+
+
+def observe_rows(count: int, endpoint: str | None = None):
+    ROWS_RETURNED.observe((endpoint or _endpoint.get(),), count)
+
+
+def observe_request(endpoint: str, method: str, status: int, seconds: float):
+    REQUEST_SECONDS.observe((endpoint, method, str(status)), seconds)
+
+
+@contextmanager
+def timed_connection(pool):
+    started = time.perf_counter()
+    with pool.connection() as con:
+        observe_stage("db_open", time.perf_counter() - started)
+        yield con
+
+
+def render() -> str:
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    return "\n".join(lines) + "\n"
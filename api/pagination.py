@@ -0,0 +1,55 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+
+def keyset_order(alias: str = "") -> str:
+    prefix = f"{alias}." if alias else ""
+    return (
+        f"{prefix}event_hour_utc desc, {prefix}icao24 desc, "
+        f"coalesce({prefix}callsign, '') desc, {prefix}flight_id desc"
+    )
+
+
+KEYSET_ORDER = keyset_order()
+
+
+def encode_cursor(row) -> str:
+    event_hour = row["event_hour_utc"]
+    payload = [
+        event_hour.isoformat() if hasattr(event_hour, "isoformat") else str(event_hour),
+        row["icao24"],
+        row["callsign"] or "",
+        row["flight_id"],
+    ]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        event_hour, icao24, callsign, flight_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(event_hour), icao24, callsign, flight_id
+    except (binascii.Error, TypeError, ValueError) as exc:
+        raise ValueError(f"Invalid cursor: {cursor}") from exc
+
+
+def keyset_clause(cursor: str, alias: str = ""):
+    event_hour, icao24, callsign, flight_id = decode_cursor(cursor)
+    prefix = f"{alias}." if alias else ""
+    callsign_expr = f"coalesce({prefix}callsign, '')"
+    clause = (
+        f"({prefix}event_hour_utc < ? or ({prefix}event_hour_utc = ? and "
+        f"({prefix}icao24 < ? or ({prefix}icao24 = ? and "
+        f"({callsign_expr} < ? or ({callsign_expr} = ? and {prefix}flight_id < ?))))))"
+    )
+    return clause, [event_hour, event_hour, icao24, icao24, callsign, callsign, flight_id]
+
+
+def next_cursor(df, limit: int):
+    if len(df) <= limit:
+        return df, None
+    page = df.iloc[:limit]
+    return page, encode_cursor(page.iloc[-1])
@@ -0,0 +1,166 @@
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import joblib
+import pandas as pd
+
+
+MODEL_FILE = "model.joblib"
+FEATURES_FILE = "features.json"
+METRICS_FILE = "metrics.json"
+WARMUP_FILE = "warmup.json"
+POINTER_FILE = "current.json"
+
+
+def _read_json(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    with path.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class LoadedModel:
+    def __init__(self, model, feature_cfg: dict, metrics: dict, signature, version: str):
+        self.model = model
+        self.feature_cfg = feature_cfg
+        self.metrics = metrics
+        self.signature = signature
+        self.version = version
+        self.loaded_at = datetime.now(timezone.utc)
+        self.warmup_ms = None
+        self.warmup_error = None
+
+    @property
+    def feature_cols(self):
+        return self.feature_cfg.get("categorical_features", []) + self.feature_cfg.get(
+            "numeric_features", []
+        )
+
+    def warmup(self, rows):
+        if not rows:
+            row = {c: "" for c in self.feature_cfg.get("categorical_features", [])}
+            row.update({c: 0 for c in self.feature_cfg.get("numeric_features", [])})
+            rows = [row]
+        started = time.perf_counter()
+        try:
+            self.model.predict(pd.DataFrame(rows, columns=self.feature_cols))
+        except Exception as exc:
+            self.warmup_error = repr(exc)
+            print("Model registry: warmup de {} en echec: {!r}".format(self.version, exc))
+            return
+        self.warmup_ms = round(1000 * (time.perf_counter() - started), 2)
+
+    def describe(self) -> dict:
+        return {
+            "version": self.version,
+            "model_family": self.feature_cfg.get("model_family"),
+            "target": self.feature_cfg.get("target"),
+            "loaded_at": self.loaded_at.isoformat(),
+            "warmup_ms": self.warmup_ms,
+            "warmup_error": self.warmup_error,
+            "metrics": {k: v for k, v in self.metrics.items() if not isinstance(v, dict)},
+        }
+
+
+class ModelRegistry:
+    def __init__(self, artifacts_dir: str, poll_interval: float = 10.0, history: int = 5):
+        self.artifacts_dir = Path(artifacts_dir)
+        self.poll_interval = poll_interval
+        self.history = history
+        self._current = None
+        self._previous = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_error = None
+
+    def _version_dir(self) -> Path:
+        pointer = _read_json(self.artifacts_dir / POINTER_FILE)
+        if pointer.get("path"):
+            return self.artifacts_dir / pointer["path"]
+        return self.artifacts_dir
+
+    def _signature(self):
+        directory = self._version_dir()
+        paths = [directory / MODEL_FILE, directory / FEATURES_FILE]
+        try:
+            return (str(directory),) + tuple((p.stat().st_mtime_ns, p.stat().st_size) for p in paths)
+        except FileNotFoundError:
+            return None
+
+    def _load(self, signature) -> LoadedModel:
+        directory = Path(signature[0])
+        feature_cfg = _read_json(directory / FEATURES_FILE)
+        metrics = _read_json(directory / METRICS_FILE)
+        model = joblib.load(directory / MODEL_FILE)
+        version = feature_cfg.get("model_version") or "mtime-{}".format(signature[1][0])
+        loaded = LoadedModel(model, feature_cfg, metrics, signature, version)
+        loaded.warmup(_read_json(directory / WARMUP_FILE).get("rows"))
+        return loaded
+
+    def refresh(self) -> bool:
+        signature = self._signature()
+        current = self._current
+        if signature is None or (current is not None and current.signature == signature):
+            return False
+        try:
+            loaded = self._load(signature)
+        except Exception as exc:
+            self.last_error = repr(exc)
+            print("Model registry: echec du chargement de {}: {!r}".format(self.artifacts_dir, exc))
+            return False
+        if self._signature() != signature:
+            return False
+        with self._lock:
+            if self._current is not None:
+                self._previous = ([self._current.describe()] + self._previous)[: self.history]
+            self._current = loaded
+            self.last_error = None
+        print("Model registry: version {} chargee".format(loaded.version))
+        return True
+
+    def current(self) -> LoadedModel:
+        loaded = self._current
+        if loaded is None and self._thread is None:
+            self.refresh()
+            loaded = self._current
+        if loaded is None:
+            raise FileNotFoundError(str(self._version_dir() / MODEL_FILE))
+        return loaded
+
+    def current_or_none(self):
+        try:
+            return self.current()
+        except FileNotFoundError:
+            return None
+
+    def versions(self) -> dict:
+        with self._lock:
+            current = self._current
+            previous = list(self._previous)
+        return {
+            "artifacts_dir": str(self.artifacts_dir),
+            "current": current.describe() if current else None,
+            "previous": previous,
+            "last_error": self.last_error,
+        }
+
+    def _poll(self):
+        while not self._stop.wait(self.poll_interval):
+            self.refresh()
+
+    def start(self):
+        self.refresh()
+        if self._thread is None and self.poll_interval > 0:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._poll, name="model-registry", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval)
+            self._thread = None
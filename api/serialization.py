@@ -0,0 +1,142 @@
+import gzip
+import io
+import zlib
+
+import orjson
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fastapi.responses import Response
+
+from api.metrics import stage
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+JSON_MEDIA_TYPE = "application/json"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPES = ("application/vnd.apache.parquet", "application/x-parquet")
+SHAPE_PATTERN = "^(records|columns)$"
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 5
+ZSTD_LEVEL = 3
+
+
+def negotiate_format(accept: str | None) -> str:
+    accept = (accept or "").lower()
+    if ARROW_MEDIA_TYPE in accept:
+        return "arrow"
+    if any(media_type in accept for media_type in PARQUET_MEDIA_TYPES):
+        return "parquet"
+    return "json"
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    accepted = set()
+    for part in (accept_encoding or "").lower().split(","):
+        coding, _, params = part.partition(";")
+        params = params.replace(" ", "")
+        try:
+            weight = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            weight = 0.0
+        if weight > 0:
+            accepted.add(coding.strip())
+    if zstandard is not None and "zstd" in accepted:
+        return "zstd"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str | None) -> bytes:
+    with stage("compression"):
+        if encoding == "zstd":
+            return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def compress_stream(chunks, encoding: str):
+    if encoding == "zstd":
+        compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        with stage("compression"):
+            out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def _python_values(column: pa.ChunkedArray) -> list:
+    if pa.types.is_timestamp(column.type) and column.type.unit == "ns":
+        column = column.cast(pa.timestamp("us", column.type.tz), safe=False)
+    return column.to_pylist()
+
+
+def json_records(table: pa.Table) -> bytes:
+    names = table.column_names
+    columns = [_python_values(column) for column in table.columns]
+    return orjson.dumps([dict(zip(names, row)) for row in zip(*columns)])
+
+
+def json_columns(table: pa.Table) -> bytes:
+    return orjson.dumps(
+        {name: _python_values(column) for name, column in zip(table.column_names, table.columns)}
+    )
+
+
+def json_envelope(meta: dict, key: str, body: bytes) -> bytes:
+    head = orjson.dumps(meta)[:-1]
+    separator = b"," if meta else b""
+    return head + separator + orjson.dumps(key) + b":" + body + b"}"
+
+
+def arrow_bytes(table: pa.Table) -> bytes:
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def parquet_bytes(table: pa.Table) -> bytes:
+    sink = io.BytesIO()
+    pq.write_table(table, sink, compression="zstd")
+    return sink.getvalue()
+
+
+def meta_headers(meta: dict) -> dict:
+    return {
+        "X-" + key.replace("_", "-").title(): str(value)
+        for key, value in meta.items()
+        if value is not None
+    }
+
+
+def render_frame(request, df: pd.DataFrame, key: str, meta: dict, shape: str = "records") -> Response:
+    output_format = negotiate_format(request.headers.get("accept"))
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    with stage("serialization"):
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if output_format == "json":
+            body = json_columns(table) if shape == "columns" else json_records(table)
+            body = json_envelope(meta, key, body)
+            media_type = JSON_MEDIA_TYPE
+        else:
+            headers.update(meta_headers(meta))
+            if output_format == "arrow":
+                body = arrow_bytes(table)
+                media_type = ARROW_MEDIA_TYPE
+            else:
+                body = parquet_bytes(table)
+                media_type = PARQUET_MEDIA_TYPES[0]
+
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    if encoding and output_format != "parquet" and len(body) >= MIN_COMPRESS_BYTES:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type=media_type, headers=headers)
@@ -0,0 +1,76 @@
+from datetime import datetime
+
+import duckdb
+import pandas as pd
+import pytest
+
+from api.pagination import KEYSET_ORDER, decode_cursor, encode_cursor, keyset_clause, next_cursor
+
+
+def make_row(event_hour, icao24="abc123", callsign="AFR1", flight_id="f1"):
+    return {
+        "event_hour_utc": event_hour,
+        "icao24": icao24,
+        "callsign": callsign,
+        "flight_id": flight_id,
+    }
+
+
+def test_cursor_round_trip():
+    row = make_row(pd.Timestamp("2026-02-01 10:00:00"))
+    assert decode_cursor(encode_cursor(row)) == (
+        datetime(2026, 2, 1, 10),
+        "abc123",
+        "AFR1",
+        "f1",
+    )
+
+
+def test_cursor_without_callsign():
+    row = make_row(datetime(2026, 2, 1, 10), callsign=None)
+    assert decode_cursor(encode_cursor(row))[2] == ""
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", "WzFd", encode_cursor(make_row("nope"))])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_next_cursor_last_page():
+    df = pd.DataFrame([make_row(datetime(2026, 2, 1, 10))])
+    page, cursor = next_cursor(df, 1)
+    assert cursor is None
+    assert len(page) == 1
+
+
+def test_keyset_pages_keep_ties():
+    con = duckdb.connect()
+    con.execute(
+        """
+        create table flights as
+        select * from (values
+            (timestamp '2026-02-01 10:00:00', 'abc123', 'AFR1', 'f1'),
+            (timestamp '2026-02-01 10:00:00', 'abc123', 'AFR1', 'f2'),
+            (timestamp '2026-02-01 10:00:00', 'abc123', 'AFR1', 'f3'),
+            (timestamp '2026-02-01 10:00:00', 'abc123', null, 'f4'),
+            (timestamp '2026-02-01 10:00:00', 'abc123', null, 'f5'),
+            (timestamp '2026-02-01 10:00:00', 'def456', 'DLH2', 'f6'),
+            (timestamp '2026-02-01 09:00:00', 'abc123', 'AFR1', 'f7')
+        ) t(event_hour_utc, icao24, callsign, flight_id)
+        """
+    )
+    seen = []
+    cursor = None
+    while True:
+        where, params = keyset_clause(cursor) if cursor else ("true", [])
+        df = con.execute(
+            f"select * from flights where {where} order by {KEYSET_ORDER} limit ?",
+            params + [3],
+        ).fetchdf()
+        page, cursor = next_cursor(df, 2)
+        seen.extend(page["flight_id"])
+        if cursor is None:
+            break
+    assert sorted(seen) == [f"f{i}" for i in range(1, 8)]
+    assert len(seen) == len(set(seen))
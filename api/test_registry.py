@@ -0,0 +1,60 @@
+import json
+
+import joblib
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.dummy import DummyRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+from api.registry import ModelRegistry
+
+
+def write_version(root, version, warmup_rows=None):
+    directory = root / "versions" / version
+    directory.mkdir(parents=True)
+    pipeline = Pipeline(
+        [
+            ("preprocess", ColumnTransformer([("cat", OneHotEncoder(), ["airline"])])),
+            ("model", DummyRegressor()),
+        ]
+    )
+    pipeline.fit(pd.DataFrame({"airline": ["AFR", "DLH"]}), [1.0, 2.0])
+    joblib.dump(pipeline, directory / "model.joblib")
+    features = {"model_version": version, "categorical_features": ["airline"], "numeric_features": []}
+    (directory / "features.json").write_text(json.dumps(features), encoding="utf-8")
+    if warmup_rows is not None:
+        (directory / "warmup.json").write_text(json.dumps({"rows": warmup_rows}), encoding="utf-8")
+
+
+def point_to(root, version):
+    payload = {"model_version": version, "path": f"versions/{version}"}
+    (root / "current.json").write_text(json.dumps(payload), encoding="utf-8")
+
+
+def test_registry_follows_pointer(tmp_path):
+    write_version(tmp_path, "v1", [{"airline": "AFR"}])
+    point_to(tmp_path, "v1")
+    registry = ModelRegistry(str(tmp_path), poll_interval=0)
+    assert registry.refresh()
+    assert registry.current().version == "v1"
+    assert registry.current().warmup_ms is not None
+
+    write_version(tmp_path, "v2", [{"airline": "DLH"}])
+    assert not registry.refresh()
+    assert registry.current().version == "v1"
+
+    point_to(tmp_path, "v2")
+    assert registry.refresh()
+    assert registry.current().version == "v2"
+    assert registry.versions()["previous"][0]["version"] == "v1"
+
+
+def test_warmup_failure_keeps_model(tmp_path):
+    write_version(tmp_path, "v1")
+    point_to(tmp_path, "v1")
+    registry = ModelRegistry(str(tmp_path), poll_interval=0)
+    assert registry.refresh()
+    loaded = registry.current()
+    assert loaded.warmup_ms is None
+    assert "ValueError" in loaded.warmup_error
@@ -0,0 +1,47 @@
+from datetime import date
+
+import numpy as np
+import orjson
+import pandas as pd
+import pyarrow as pa
+
+from api.serialization import json_columns, json_records
+
+
+def sample_table():
+    df = pd.DataFrame(
+        {
+            "event_hour_utc": pd.to_datetime(["2026-02-01 10:00:00", None]),
+            "seen_at": pd.to_datetime(
+                ["2026-02-01 10:00:00.250000", "2026-02-01 11:00:00.000000"], utc=True
+            ),
+            "event_day_utc": [date(2026, 2, 1), None],
+            "delay_min": [1.5, np.nan],
+            "callsign": ["AFR1", None],
+        }
+    )
+    return df, pa.Table.from_pandas(df, preserve_index=False)
+
+
+def test_json_records_keep_isoformat():
+    df, table = sample_table()
+    records = orjson.loads(json_records(table))
+    assert records[0] == {
+        "event_hour_utc": df["event_hour_utc"][0].isoformat(),
+        "seen_at": df["seen_at"][0].isoformat(),
+        "event_day_utc": "2026-02-01",
+        "delay_min": 1.5,
+        "callsign": "AFR1",
+    }
+    assert records[1]["event_hour_utc"] is None
+    assert records[1]["delay_min"] is None
+    assert records[1]["seen_at"] == "2026-02-01T11:00:00+00:00"
+
+
+def test_json_columns_match_records():
+    _, table = sample_table()
+    columns = orjson.loads(json_columns(table))
+    records = orjson.loads(json_records(table))
+    assert list(columns) == table.column_names
+    assert [dict(zip(columns, row)) for row in zip(*columns.values())] == records
+
@@ -0,0 +1,61 @@
+import argparse
+import json
+from pathlib import Path
+
+
+def load(path: str) -> dict:
+    with Path(path).open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def stage_rows(report: dict) -> dict:
+    rows = {}
+    for stage, result in report.get("stages", {}).items():
+        if stage == "api":
+            for endpoint, stats in result.items():
+                rows[f"api {endpoint} p50_ms"] = stats.get("p50_ms")
+                rows[f"api {endpoint} p95_ms"] = stats.get("p95_ms")
+            continue
+        for key, value in result.items():
+            if key.endswith("seconds") and isinstance(value, (int, float)):
+                rows[f"{stage} {key}"] = value
+    return rows
+
+
+def label(report: dict, path: str) -> str:
+    params = report.get("params", {})
+    return "{}a x {}d x {}f".format(
+        params.get("airports", "?"), params.get("days", "?"), params.get("flights_per_day", "?")
+    ) if params else Path(path).stem
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare benchmark result files side by side")
+    parser.add_argument("results", nargs="+", help="bench/results/*.json (the first is the baseline)")
+    args = parser.parse_args()
+
+    reports = [load(p) for p in args.results]
+    columns = [stage_rows(r) for r in reports]
+    keys = []
+    for col in columns:
+        keys += [k for k in col if k not in keys]
+
+    headers = [label(r, p) for r, p in zip(reports, args.results)]
+    width = max(len(k) for k in keys) if keys else 10
+    print("{:<{w}}  {}".format("metric", "  ".join(f"{h:>18}" for h in headers), w=width))
+    for key in keys:
+        base = columns[0].get(key)
+        cells = []
+        for col in columns:
+            value = col.get(key)
+            if value is None:
+                cells.append(f"{'-':>18}")
+            elif base and col is not columns[0]:
+                cells.append(f"{value:>10} (x{value / base:.2f})")
+            else:
+                cells.append(f"{value:>18}")
+        print("{:<{w}}  {}".format(key, "  ".join(cells), w=width))
+
+
+if __name__ == "__main__":
+    main()
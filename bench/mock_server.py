@@ -0,0 +1,158 @@
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from synthetic import fleet, load_airports, opensky_flights, weather_payload
+
+
+class MockApis:
+    def __init__(self, airport_codes, flights_per_day: int, latency_ms: float = 0.0):
+        self.airport_codes = list(airport_codes)
+        self.flights_per_day = flights_per_day
+        self.latency_s = latency_ms / 1000.0
+        self.aircraft = fleet()
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.bytes_sent = 0
+
+    def count(self, name: str, size: int):
+        with self.lock:
+            self.requests[name] = self.requests.get(name, 0) + 1
+            self.bytes_sent += size
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"requests": dict(self.requests), "bytes_sent": self.bytes_sent}
+
+    def flights(self, flight_type: str, query: dict):
+        airport = query["airport"][0]
+        if airport not in self.airport_codes:
+            return 404, []
+        day = pd.Timestamp(int(query["begin"][0]), unit="s", tz="UTC").strftime("%Y-%m-%d")
+        others = [c for c in self.airport_codes if c != airport] or self.airport_codes
+        records = opensky_flights(airport, others, day, flight_type, self.flights_per_day, self.aircraft)
+        return 200, records
+
+    def archive(self, query: dict):
+        latitudes = query["latitude"][0].split(",")
+        longitudes = query["longitude"][0].split(",")
+        start_date = query["start_date"][0]
+        end_date = query["end_date"][0]
+        payloads = [
+            weather_payload(float(lat), float(lon), start_date, end_date)
+            for lat, lon in zip(latitudes, longitudes)
+        ]
+        return 200, payloads[0] if len(payloads) == 1 else payloads
+
+
+def make_handler(apis: MockApis):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_json(self, name: str, status: int, payload, headers=None):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+            apis.count(name, len(body))
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            self.rfile.read(length)
+            if self.path.rstrip("/").endswith("/token"):
+                self.send_json(
+                    "token",
+                    200,
+                    {"access_token": "bench-token", "token_type": "Bearer", "expires_in": 1800},
+                )
+                return
+            self.send_json("unknown", 404, {"error": "not found"})
+
+        def do_GET(self):
+            if apis.latency_s:
+                time.sleep(apis.latency_s)
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            if url.path.endswith("/flights/departure") or url.path.endswith("/flights/arrival"):
+                flight_type = url.path.rsplit("/", 1)[-1]
+                status, payload = apis.flights(flight_type, query)
+                self.send_json(
+                    "opensky", status, payload, {"X-Rate-Limit-Remaining": "100000"}
+                )
+                return
+            if url.path.endswith("/v1/archive"):
+                status, payload = apis.archive(query)
+                self.send_json("open_meteo", status, payload)
+                return
+            self.send_json("unknown", 404, {"error": "not found"})
+
+    return Handler
+
+
+class MockServer:
+    def __init__(self, apis: MockApis, host: str = "127.0.0.1", port: int = 0):
+        self.apis = apis
+        self.httpd = ThreadingHTTPServer((host, port), make_handler(apis))
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def urls(self) -> dict:
+        return {
+            "opensky_base_url": f"{self.base_url}/api",
+            "opensky_token_url": f"{self.base_url}/auth/token",
+            "weather_archive_url": f"{self.base_url}/v1/archive",
+        }
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenSky + Open-Meteo APIs for benchmarks")
+    parser.add_argument("--airports-file", default="data/reference/airports_eu.csv")
+    parser.add_argument("--airports", type=int, default=20)
+    parser.add_argument("--flights-per-day", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    airports = load_airports(args.airports_file, args.airports)
+    apis = MockApis(airports["icao"], args.flights_per_day, args.latency_ms)
+    server = MockServer(apis, port=args.port)
+    for name, url in server.urls().items():
+        print(f"{name}: {url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+import argparse
+import datetime as dt
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import duckdb
+import yaml
+
+from mock_server import MockApis, MockServer
+from synthetic import bench_days, load_airports, write_raw_tree
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+STAGES = ["generate", "ingest", "dbt", "train", "api"]
+PREDICT_ROWS = 100
+
+
+def artifact_dir(artifacts: Path) -> Path:
+    pointer = artifacts / "current.json"
+    if not pointer.exists():
+        return artifacts
+    with pointer.open("r", encoding="utf-8") as f:
+        return artifacts / json.load(f)["path"]
+
+
+def timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return round(time.perf_counter() - started, 3), result
+
+
+def run(cmd, log_path: Path, env=None, cwd=REPO_ROOT):
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with log_path.open("w", encoding="utf-8") as log:
+        completed = subprocess.run(
+            [str(c) for c in cmd], cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+    if completed.returncode != 0:
+        raise RuntimeError("Echec ({}) de {}: voir {}".format(completed.returncode, cmd[1], log_path))
+
+
+def dir_stats(path: Path) -> dict:
+    files = [p for p in path.rglob("*") if p.is_file()] if path.exists() else []
+    return {"files": len(files), "bytes": sum(p.stat().st_size for p in files)}
+
+
+def stage_generate(args, work: Path, airports):
+    start, end = bench_days(args.start, args.days)
+    seconds, counts = timed(write_raw_tree, work / "raw", airports, start, end, args.flights_per_day)
+    return dict(counts, seconds=seconds, **dir_stats(work / "raw"))
+
+
+def write_ingest_config(path: Path, work: Path, urls: dict, args):
+    start, end = bench_days(args.start, args.days)
+    config = {
+        "opensky": {
+            "base_url": urls["opensky_base_url"],
+            "token_url": urls["opensky_token_url"],
+            "oauth": {"client_id": "bench", "client_secret": "bench"},
+        },
+        "storage": {
+            "raw_dir": str(work / "ingest" / "raw"),
+            "reference_dir": str(work / "reference"),
+            "format": args.format,
+            "parquet_dir": str(work / "ingest" / "parquet"),
+        },
+        "airports": {"file": str(work / "reference" / "airports_eu.csv")},
+        "weather": {"archive_url": urls["weather_archive_url"]},
+        "run": {"start_date": start.isoformat(), "end_date": end.isoformat()},
+    }
+    with path.open("w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f)
+
+
+def stage_ingest(args, work: Path, airports):
+    shutil.rmtree(work / "ingest", ignore_errors=True)
+    (work / "ingest").mkdir(parents=True)
+    apis = MockApis(airports["icao"], args.flights_per_day, args.latency_ms)
+    server = MockServer(apis).start()
+    config_path = work / "ingest" / "config.yaml"
+    write_ingest_config(config_path, work, server.urls(), args)
+    weather_cmd = [
+        sys.executable, "ingestion/weather_fetch.py", "--config", config_path, "--sleep", "0",
+        "--format", args.format,
+    ]
+    if args.weather_mode == "batched":
+        weather_cmd.append("--batched")
+    try:
+        opensky_s, _ = timed(
+            run,
+            [
+                sys.executable, "ingestion/opensky_fetch.py", "--config", config_path,
+                "--workers", args.workers, "--rate", "1000", "--format", args.format,
+            ],
+            work / "logs" / "opensky_fetch.log",
+        )
+        weather_s, _ = timed(run, weather_cmd, work / "logs" / "weather_fetch.log")
+    finally:
+        server.stop()
+    output_dir = work / "ingest" / ("parquet" if args.format == "parquet" else "raw")
+    return {
+        "opensky_seconds": opensky_s,
+        "weather_seconds": weather_s,
+        "seconds": round(opensky_s + weather_s, 3),
+        "format": args.format,
+        "weather_mode": args.weather_mode,
+        "workers": args.workers,
+        "mock": apis.stats(),
+        **dir_stats(output_dir),
+    }
+
+
+def dbt_vars(args, work: Path, ingested: bool) -> dict:
+    root = work / "ingest" if ingested else work
+    return {
+        "raw_dir": str(root / "raw"),
+        "parquet_dir": str(root / "parquet"),
+        "reference_dir": str(work / "reference"),
+        "raw_format": args.format if ingested else "json",
+    }
+
+
+def stage_dbt(args, work: Path, db_path: Path, ingested: bool):
+    dbt = shutil.which("dbt")
+    if dbt is None:
+        raise RuntimeError("dbt introuvable dans le PATH (pip install dbt-duckdb)")
+    profiles_dir = work / "dbt_profiles"
+    profiles_dir.mkdir(parents=True, exist_ok=True)
+    with (profiles_dir / "profiles.yml").open("w", encoding="utf-8") as f:
+        yaml.safe_dump(
+            {
+                "open_data_air_traffic": {
+                    "target": "bench",
+                    "outputs": {
+                        "bench": {"type": "duckdb", "path": str(db_path), "threads": args.dbt_threads}
+                    },
+                }
+            },
+            f,
+        )
+    if db_path.exists():
+        db_path.unlink()
+    env = dict(
+        os.environ,
+        DBT_TARGET_PATH=str(work / "dbt_target"),
+        DBT_LOG_PATH=str(work / "logs" / "dbt"),
+    )
+    base = [
+        dbt, "build", "--project-dir", "dbt", "--profiles-dir", profiles_dir,
+        "--vars", json.dumps(dbt_vars(args, work, ingested)),
+    ]
+    full_s, _ = timed(run, base + ["--full-refresh"], work / "logs" / "dbt_full.log", env)
+    incremental_s, _ = timed(run, base, work / "logs" / "dbt_incremental.log", env)
+
+    con = duckdb.connect(str(db_path), read_only=True)
+    try:
+        rows = {
+            table: con.execute(f"select count(*) from {table}").fetchone()[0]
+            for table in ("stg_opensky_flights", "stg_weather_hourly", "mart_flight_features")
+        }
+    finally:
+        con.close()
+    return {
+        "seconds": full_s,
+        "full_refresh_seconds": full_s,
+        "incremental_noop_seconds": incremental_s,
+        "rows": rows,
+        "db_bytes": db_path.stat().st_size,
+    }
+
+
+def stage_train(args, work: Path, db_path: Path):
+    artifacts = work / "artifacts"
+    cmd = [
+        sys.executable, "ml/train.py", "--db-path", db_path, "--target", args.target,
+        "--target-type", args.target_type, "--test-days", max(1, args.days // 4),
+        "--output-dir", artifacts, "--model", args.model,
+    ]
+    if args.streaming:
+        cmd.append("--streaming")
+    seconds, _ = timed(run, cmd, work / "logs" / "train.log")
+    with (artifact_dir(artifacts) / "metrics.json").open("r", encoding="utf-8") as f:
+        metrics = json.load(f)
+    return {
+        "seconds": seconds,
+        "model": args.model,
+        "streaming": args.streaming,
+        "metrics": {k: v for k, v in metrics.items() if not isinstance(v, dict)},
+        "profile": metrics.get("profile"),
+    }
+
+
+def summarize(samples) -> dict:
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "min_ms": round(ordered[0], 2),
+        "p50_ms": round(statistics.median(ordered), 2),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 2),
+        "max_ms": round(ordered[-1], 2),
+        "mean_ms": round(statistics.fmean(ordered), 2),
+    }
+
+
+def api_cases(db_path: Path, artifacts: Path):
+    with (artifact_dir(artifacts) / "features.json").open("r", encoding="utf-8") as f:
+        feature_cfg = json.load(f)
+    feature_cols = feature_cfg["categorical_features"] + feature_cfg["numeric_features"]
+    con = duckdb.connect(str(db_path), read_only=True)
+    try:
+        icao24, airport = con.execute(
+            """
+            select icao24, airport_icao
+            from mart_flight_features
+            group by 1, 2
+            order by count(*) desc
+            limit 1
+            """
+        ).fetchone()
+        sample = con.execute(
+            f"select {', '.join(feature_cols)} from mart_flight_features limit {PREDICT_ROWS}"
+        ).fetchdf()
+    finally:
+        con.close()
+    records = json.loads(sample.to_json(orient="records"))
+    columns = {c: json.loads(sample[c].to_json(orient="values")) for c in sample.columns}
+
+    return [
+        ("health", "get", "/health", {}, None),
+        ("models", "get", "/models", {}, None),
+        ("flights", "get", "/flights", {"limit": 100}, None),
+        ("flights_airport", "get", "/flights", {"limit": 100, "airport_icao": airport}, None),
+        ("flights_icao24", "get", f"/flights/{icao24}", {"limit": 100}, None),
+        ("predictions", "get", "/predictions", {"limit": 100}, None),
+        ("predictions_csv", "get", "/predictions.csv", {"limit": 1000}, None),
+        ("predictions_export_arrow", "get", "/predictions/export", {"format": "arrow"}, None),
+        ("flights_export_ndjson", "get", "/flights/export", {"format": "ndjson"}, None),
+        ("airports", "get", "/airports", {}, None),
+        ("airport_daily", "get", f"/airports/{airport}/daily", {}, None),
+        ("airports_nearest", "get", "/airports/nearest", {"lat": 48.85, "lon": 2.35, "k": 5}, None),
+        ("predict_records", "post", "/predict", {}, {"records": records}),
+        ("predict_columns", "post", "/predict", {}, {"columns": columns}),
+    ]
+
+
+def stage_api(args, work: Path, db_path: Path):
+    os.environ["API_DB_PATH"] = str(db_path)
+    os.environ["API_MODEL_DIR"] = str(work / "artifacts")
+    os.environ["API_MODEL_POLL_S"] = "0"
+    os.environ["API_AIRPORTS_FILE"] = str(work / "reference" / "airports_eu.csv")
+    sys.path.insert(0, str(REPO_ROOT))
+    from fastapi.testclient import TestClient
+
+    from api.app import app
+
+    results = {}
+    with TestClient(app) as client:
+        for name, method, path, params, body in api_cases(db_path, work / "artifacts"):
+            call = getattr(client, method)
+            kwargs = {"params": params}
+            if body is not None:
+                kwargs["json"] = body
+            response = call(path, **kwargs)
+            samples = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                response = call(path, **kwargs)
+                _ = response.content
+                samples.append(1000 * (time.perf_counter() - started))
+            results[name] = dict(
+                summarize(samples), status=response.status_code, bytes=len(response.content)
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark on a synthetic dataset")
+    parser.add_argument("--airports", type=int, default=20)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--flights-per-day", type=int, default=50, help="Per airport and direction")
+    parser.add_argument("--start", default="2026-01-01", help="First synthetic day (YYYY-MM-DD)")
+    parser.add_argument("--stages", default=",".join(STAGES), help="Comma-separated subset of " + ",".join(STAGES))
+    parser.add_argument("--work-dir", default="data/bench")
+    parser.add_argument("--output-dir", default="bench/results")
+    parser.add_argument("--airports-file", default="data/reference/airports_eu.csv")
+    parser.add_argument("--format", choices=["json", "parquet"], default="json", help="Ingestion output")
+    parser.add_argument("--weather-mode", choices=["single", "batched"], default="batched")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Mock API latency per request")
+    parser.add_argument("--dbt-threads", type=int, default=4)
+    parser.add_argument("--target", default="flight_duration_min")
+    parser.add_argument("--target-type", choices=["regression", "classification"], default="regression")
+    parser.add_argument("--model", default="hgb")
+    parser.add_argument("--streaming", action="store_true")
+    parser.add_argument("--repeat", type=int, default=20, help="Calls per API endpoint")
+    args = parser.parse_args()
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = sorted(set(stages).difference(STAGES))
+    if unknown:
+        raise SystemExit("Etapes inconnues: {}".format(unknown))
+
+    work = (REPO_ROOT / args.work_dir).resolve()
+    work.mkdir(parents=True, exist_ok=True)
+    db_path = work / "analytics.duckdb"
+    airports = load_airports(str(REPO_ROOT / args.airports_file), args.airports)
+    (work / "reference").mkdir(exist_ok=True)
+    airports.to_csv(work / "reference" / "airports_eu.csv", index=False)
+
+    report = {
+        "started_at": dt.datetime.now(dt.timezone.utc).isoformat(),
+        "params": vars(args),
+        "env": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "stages": {},
+    }
+    for stage in STAGES:
+        if stage not in stages:
+            continue
+        print("== {}".format(stage))
+        if stage == "generate":
+            shutil.rmtree(work / "raw", ignore_errors=True)
+            result = stage_generate(args, work, airports)
+        elif stage == "ingest":
+            result = stage_ingest(args, work, airports)
+        elif stage == "dbt":
+            result = stage_dbt(args, work, db_path, ingested="ingest" in stages)
+        elif stage == "train":
+            result = stage_train(args, work, db_path)
+        else:
+            result = stage_api(args, work, db_path)
+        report["stages"][stage] = result
+        print(json.dumps(result, indent=2, default=str))
+
+    output_dir = REPO_ROOT / args.output_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
+    stamp = dt.datetime.now(dt.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    output_path = output_dir / f"bench_{stamp}_{args.airports}a_{args.days}d.json"
+    with output_path.open("w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    print("Resultats: {}".format(output_path))
+
+
+if __name__ == "__main__":
+    main()
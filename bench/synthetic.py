@@ -0,0 +1,143 @@
+import datetime as dt
+import json
+import random
+import zlib
+from pathlib import Path
+
+import pandas as pd
+
+
+HOURLY_VARS = ["temperature_2m", "precipitation", "wind_speed_10m", "cloud_cover"]
+HOURLY_UNITS = {
+    "time": "iso8601",
+    "temperature_2m": "°C",
+    "precipitation": "mm",
+    "wind_speed_10m": "km/h",
+    "cloud_cover": "%",
+}
+AIRLINES = ["AFR", "DLH", "BAW", "KLM", "RYR", "EZY", "IBE", "SAS", "AZA", "SWR", "TAP", "VLG"]
+FLEET_SIZE = 2000
+
+
+def seeded(*parts) -> random.Random:
+    key = "|".join(str(p) for p in parts)
+    return random.Random(zlib.crc32(key.encode("utf-8")))
+
+
+def fleet():
+    rng = seeded("fleet")
+    return ["{:06x}".format(rng.randrange(16**6)) for _ in range(FLEET_SIZE)]
+
+
+def load_airports(reference_file: str, count: int) -> pd.DataFrame:
+    df = pd.read_csv(reference_file)
+    df = df.dropna(subset=["icao", "latitude", "longitude"]).drop_duplicates(subset=["icao"])
+    if len(df) < count:
+        raise ValueError("{} aeroports demandes, {} disponibles dans {}".format(
+            count, len(df), reference_file
+        ))
+    return df.head(count).reset_index(drop=True)
+
+
+def day_start(day) -> int:
+    return int(pd.Timestamp(day, tz="UTC").timestamp())
+
+
+def opensky_flights(airport: str, others, day, flight_type: str, count: int, aircraft=None):
+    rng = seeded("opensky", airport, day, flight_type)
+    aircraft = aircraft or fleet()
+    begin = day_start(day)
+    records = []
+    for _ in range(count):
+        duration = rng.randint(35, 240) * 60
+        other = rng.choice(others) if rng.random() > 0.05 else None
+        if flight_type == "departure":
+            first_seen = begin + rng.randrange(86400)
+            last_seen = first_seen + duration
+            departure, arrival = airport, other
+        else:
+            last_seen = begin + rng.randrange(86400)
+            first_seen = last_seen - duration
+            departure, arrival = other, airport
+        records.append(
+            {
+                "icao24": rng.choice(aircraft),
+                "firstSeen": first_seen,
+                "estDepartureAirport": departure,
+                "lastSeen": last_seen,
+                "estArrivalAirport": arrival,
+                "callsign": "{}{}".format(rng.choice(AIRLINES), rng.randint(1, 9999)).ljust(8),
+                "estDepartureAirportHorizDistance": rng.randint(0, 5000),
+                "estDepartureAirportVertDistance": rng.randint(0, 500),
+                "estArrivalAirportHorizDistance": rng.randint(0, 5000),
+                "estArrivalAirportVertDistance": rng.randint(0, 500),
+                "departureAirportCandidatesCount": rng.randint(0, 3),
+                "arrivalAirportCandidatesCount": rng.randint(0, 3),
+            }
+        )
+    return records
+
+
+def weather_payload(latitude: float, longitude: float, start_date: str, end_date: str) -> dict:
+    hourly = {"time": []}
+    hourly.update({name: [] for name in HOURLY_VARS})
+    for day in pd.date_range(start_date, end_date, freq="D"):
+        day_str = day.strftime("%Y-%m-%d")
+        rng = seeded("weather", round(float(latitude), 4), round(float(longitude), 4), day_str)
+        base = rng.uniform(-5, 25)
+        for hour in range(24):
+            hourly["time"].append("{}T{:02d}:00".format(day_str, hour))
+            hourly["temperature_2m"].append(round(base + rng.uniform(-4, 4), 1))
+            hourly["precipitation"].append(round(max(0.0, rng.gauss(0, 1)), 1))
+            hourly["wind_speed_10m"].append(round(rng.uniform(0, 45), 1))
+            hourly["cloud_cover"].append(rng.randint(0, 100))
+    return {
+        "latitude": float(latitude),
+        "longitude": float(longitude),
+        "generationtime_ms": 0.1,
+        "utc_offset_seconds": 0,
+        "timezone": "GMT",
+        "timezone_abbreviation": "GMT",
+        "elevation": 50.0,
+        "hourly_units": HOURLY_UNITS,
+        "hourly": hourly,
+    }
+
+
+def write_raw_tree(raw_dir: str, airports: pd.DataFrame, start, end, flights_per_day: int) -> dict:
+    raw = Path(raw_dir)
+    codes = list(airports["icao"])
+    aircraft = fleet()
+    counts = {"opensky_files": 0, "opensky_records": 0, "weather_files": 0, "weather_rows": 0}
+    for day in pd.date_range(start, end, freq="D"):
+        day_str = day.strftime("%Y-%m-%d")
+        opensky_dir = raw / "opensky" / day_str
+        weather_dir = raw / "weather" / day_str
+        opensky_dir.mkdir(parents=True, exist_ok=True)
+        weather_dir.mkdir(parents=True, exist_ok=True)
+        for row in airports.itertuples(index=False):
+            others = [c for c in codes if c != row.icao] or codes
+            for flight_type in ("departure", "arrival"):
+                records = opensky_flights(
+                    row.icao, others, day_str, flight_type, flights_per_day, aircraft
+                )
+                with (opensky_dir / f"{row.icao}_{flight_type}.jsonl").open("w", encoding="utf-8") as f:
+                    for record in records:
+                        record["flight_type"] = flight_type
+                        record["airport_icao"] = row.icao
+                        f.write(json.dumps(record, ensure_ascii=True) + "\n")
+                counts["opensky_files"] += 1
+                counts["opensky_records"] += len(records)
+
+            payload = weather_payload(row.latitude, row.longitude, day_str, day_str)
+            payload["airport_icao"] = row.icao
+            with (weather_dir / f"{row.icao}.json").open("w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=True)
+            counts["weather_files"] += 1
+            counts["weather_rows"] += len(payload["hourly"]["time"])
+    return counts
+
+
+def bench_days(start: str, days: int):
+    first = dt.date.fromisoformat(start)
+    return first, first + dt.timedelta(days=days - 1)
@@ -0,0 +1,26 @@
+{% macro incremental_day_filter(day_column, target_column=none, context_days=0) -%}
+{%- set target_column = target_column or day_column -%}
+{%- if var("start_day", none) is not none -%}
+    {{ day_column }} between date '{{ var("start_day") }}'{% if context_days %} - {{ context_days }}{% endif %} and date '{{ var("end_day", var("start_day")) }}'
+{%- elif is_incremental() -%}
+    {%- set watermark = none -%}
+    {%- if execute -%}
+        {%- set result = run_query(
+            "select cast(max(" ~ target_column ~ ") as date) - " ~ ((var("lookback_days", 1) | int) + context_days) ~ " from " ~ this
+        ) -%}
+        {%- set watermark = result.columns[0].values()[0] -%}
+    {%- endif -%}
+    {%- if watermark is not none -%}
+    {{ day_column }} >= date '{{ watermark }}'
+    {%- else -%}
+    true
+    {%- endif -%}
+{%- else -%}
+    true
+{%- endif -%}
+{%- endmacro %}
+
+
+{% macro raw_partition_day(path_column="filename") -%}
+    cast(regexp_extract({{ path_column }}, '([0-9]{4}-[0-9]{2}-[0-9]{2})', 1) as date)
+{%- endmacro %}
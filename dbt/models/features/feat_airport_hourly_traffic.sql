@@ -0,0 +1,66 @@
+{{
+    config(
+        unique_key='event_day_utc'
+    )
+}}
+
+with context as (
+    select
+        airport_icao,
+        event_hour_utc,
+        flight_type
+    from {{ ref('stg_opensky_flights') }}
+    where {{ incremental_day_filter('event_day_utc', context_days=1) }}
+),
+hourly as (
+    select
+        airport_icao,
+        event_hour_utc,
+        cast(event_hour_utc as date) as event_day_utc,
+        count(*) as movements_count,
+        count(*) filter (where flight_type = 'departure') as departures_count,
+        count(*) filter (where flight_type = 'arrival') as arrivals_count
+    from context
+    group by 1, 2
+),
+windowed as (
+    select
+        *,
+        sum(movements_count) over (
+            partition by airport_icao order by event_hour_utc
+            range between interval 1 hour preceding and interval 1 hour preceding
+        ) as movements_prev_1h,
+        sum(movements_count) over (
+            partition by airport_icao order by event_hour_utc
+            range between interval 3 hours preceding and interval 1 hour preceding
+        ) as movements_prev_3h,
+        sum(departures_count) over (
+            partition by airport_icao order by event_hour_utc
+            range between interval 3 hours preceding and interval 1 hour preceding
+        ) as departures_prev_3h,
+        sum(arrivals_count) over (
+            partition by airport_icao order by event_hour_utc
+            range between interval 3 hours preceding and interval 1 hour preceding
+        ) as arrivals_prev_3h,
+        sum(movements_count) over (
+            partition by airport_icao order by event_hour_utc
+            range between interval 24 hours preceding and interval 1 hour preceding
+        ) as movements_prev_24h
+    from hourly
+)
+
+select
+    airport_icao,
+    event_hour_utc,
+    event_day_utc,
+    movements_count,
+    departures_count,
+    arrivals_count,
+    cast(coalesce(movements_prev_1h, 0) as bigint) as movements_prev_1h,
+    cast(coalesce(movements_prev_3h, 0) as bigint) as movements_prev_3h,
+    cast(coalesce(departures_prev_3h, 0) as bigint) as departures_prev_3h,
+    cast(coalesce(arrivals_prev_3h, 0) as bigint) as arrivals_prev_3h,
+    cast(coalesce(movements_prev_24h, 0) as bigint) as movements_prev_24h
+from windowed
+where {{ incremental_day_filter('event_day_utc') }}
+order by airport_icao, event_hour_utc
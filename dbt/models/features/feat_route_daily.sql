@@ -0,0 +1,41 @@
+{{
+    config(
+        unique_key='event_day_utc'
+    )
+}}
+
+with context as (
+    select
+        concat(est_departure_airport, '-', est_arrival_airport) as route_code,
+        event_day_utc,
+        icao24,
+        first_seen
+    from {{ ref('stg_opensky_flights') }}
+    where {{ incremental_day_filter('event_day_utc', context_days=7) }}
+),
+daily as (
+    select
+        route_code,
+        event_day_utc,
+        count(distinct (icao24, first_seen)) as flights_count
+    from context
+    group by 1, 2
+),
+windowed as (
+    select
+        *,
+        sum(flights_count) over (
+            partition by route_code order by event_day_utc
+            range between interval 7 days preceding and interval 1 day preceding
+        ) as flights_prev_7d
+    from daily
+)
+
+select
+    route_code,
+    event_day_utc,
+    flights_count,
+    cast(coalesce(flights_prev_7d, 0) as bigint) as flights_prev_7d
+from windowed
+where {{ incremental_day_filter('event_day_utc') }}
+order by route_code, event_day_utc
@@ -1,26 +1,73 @@
+{{
+    config(
+        unique_key='event_day_utc'
+    )
+}}
+
+{% set tolerance_hours = var("weather_tolerance_hours", 3) | int %}
+{% set weather_columns = ["temperature_2m", "precipitation", "wind_speed_10m", "cloud_cover"] %}
+
 with flights as (
     select *
     from {{ ref('stg_opensky_flights') }}
+    where {{ incremental_day_filter('event_day_utc') }}
 ),
 weather as (
-    select *
+    select
+        airport_icao,
+        time_utc,
+        {{ weather_columns | join(',\n        ') }}
     from {{ ref('stg_weather_hourly') }}
+    where time_utc between
+        (select min(event_hour_utc) from flights) - interval {{ tolerance_hours }} hour
+        and (select max(event_hour_utc) from flights) + interval {{ tolerance_hours }} hour
+),
+candidates as (
+    select
+        f.*,
+        date_diff('hour', wb.time_utc, f.event_hour_utc) as hours_before,
+        date_diff('hour', f.event_hour_utc, wa.time_utc) as hours_after,
+        {%- for column in weather_columns %}
+        wb.{{ column }} as before_{{ column }},
+        wa.{{ column }} as after_{{ column }}{{ "," if not loop.last }}
+        {%- endfor %}
+    from flights f
+    asof left join weather wb
+        on wb.airport_icao = f.airport_icao
+       and f.event_hour_utc >= wb.time_utc
+    asof left join weather wa
+        on wa.airport_icao = f.airport_icao
+       and f.event_hour_utc <= wa.time_utc
+),
+picked as (
+    select
+        *,
+        case
+            when hours_before <= {{ tolerance_hours }}
+                and (hours_after is null or hours_before <= hours_after) then 'before'
+            when hours_after <= {{ tolerance_hours }} then 'after'
+        end as weather_side
+    from candidates
 )
 
 select
-    f.*,
-    case
-        when f.flight_type = 'departure' then f.first_seen_hour_utc
-        else f.last_seen_hour_utc
-    end as event_hour_utc,
-    w.temperature_2m,
-    w.precipitation,
-    w.wind_speed_10m,
-    w.cloud_cover
-from flights f
-left join weather w
-    on w.airport_icao = f.airport_icao
-   and w.time_utc = case
-        when f.flight_type = 'departure' then f.first_seen_hour_utc
-        else f.last_seen_hour_utc
-    end
+    * exclude (
+        hours_before,
+        hours_after,
+        weather_side,
+        {%- for column in weather_columns %}
+        before_{{ column }},
+        after_{{ column }}{{ "," if not loop.last }}
+        {%- endfor %}
+    ),
+    {%- for column in weather_columns %}
+    case weather_side
+        when 'before' then before_{{ column }}
+        when 'after' then after_{{ column }}
+    end as {{ column }},
+    {%- endfor %}
+    case weather_side
+        when 'before' then -hours_before
+        when 'after' then hours_after
+    end as weather_offset_hours
+from picked
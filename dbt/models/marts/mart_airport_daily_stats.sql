@@ -0,0 +1,55 @@
+{{
+    config(
+        unique_key='event_day_utc'
+    )
+}}
+
+with flights as (
+    select *
+    from {{ ref('mart_flight_features') }}
+    where {{ incremental_day_filter('event_day_utc') }}
+),
+weather as (
+    select
+        airport_icao,
+        day_utc as event_day_utc,
+        count(*) as weather_hours_count
+    from {{ ref('stg_weather_hourly') }}
+    where {{ incremental_day_filter('day_utc', 'event_day_utc') }}
+    group by 1, 2
+),
+daily as (
+    select
+        airport_icao,
+        event_day_utc,
+        count(*) as flights_count,
+        count(*) filter (where flight_type = 'departure') as departures_count,
+        count(*) filter (where flight_type = 'arrival') as arrivals_count,
+        min(event_hour_utc) as first_seen,
+        max(event_hour_utc) as last_seen,
+        sum(flight_duration_min) as duration_sum_min,
+        count(flight_duration_min) as duration_count,
+        count(*) filter (where temperature_2m is not null) as flights_with_weather
+    from flights
+    group by 1, 2
+)
+
+select
+    d.airport_icao,
+    d.event_day_utc,
+    d.flights_count,
+    d.departures_count,
+    d.arrivals_count,
+    d.first_seen,
+    d.last_seen,
+    d.duration_sum_min,
+    d.duration_count,
+    d.duration_sum_min / nullif(d.duration_count, 0) as mean_duration_min,
+    d.flights_with_weather,
+    round(100.0 * d.flights_with_weather / nullif(d.flights_count, 0), 2) as pct_flights_with_weather,
+    coalesce(w.weather_hours_count, 0) as weather_hours_count
+from daily d
+left join weather w
+    on w.airport_icao = d.airport_icao
+   and w.event_day_utc = d.event_day_utc
+order by d.airport_icao, d.event_day_utc
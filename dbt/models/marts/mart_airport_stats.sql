@@ -0,0 +1,20 @@
+{{
+    config(
+        materialized='table'
+    )
+}}
+
+select
+    airport_icao,
+    sum(flights_count) as flights_count,
+    sum(departures_count) as departures_count,
+    sum(arrivals_count) as arrivals_count,
+    min(first_seen) as first_seen,
+    max(last_seen) as last_seen,
+    sum(duration_sum_min) / nullif(sum(duration_count), 0) as mean_duration_min,
+    round(100.0 * sum(flights_with_weather) / nullif(sum(flights_count), 0), 2) as pct_flights_with_weather,
+    round(100.0 * sum(weather_hours_count) / nullif(24 * count(*), 0), 2) as pct_weather_hours,
+    count(*) as days_count
+from {{ ref('mart_airport_daily_stats') }}
+group by 1
+order by flights_count desc
@@ -1,6 +1,28 @@
+{{
+    config(
+        unique_key='event_day_utc',
+        post_hook=[
+            "create index if not exists mart_flight_features_icao24_idx on {{ this }} (icao24)"
+        ]
+    )
+}}
+
 with flights as (
     select *
     from {{ ref('int_flights_with_weather') }}
+    where {{ incremental_day_filter('event_day_utc') }}
+),
+traffic as (
+    select *
+    from {{ ref('feat_airport_hourly_traffic') }}
+    where event_hour_utc between
+        (select min(event_hour_utc) from flights)
+        and (select max(event_hour_utc) from flights)
+),
+routes as (
+    select *
+    from {{ ref('feat_route_daily') }}
+    where {{ incremental_day_filter('event_day_utc') }}
 ),
 airports as (
     select *
@@ -15,6 +37,7 @@ holidays as (
 )
 
 select
+    md5(concat_ws('|', f.icao24, f.flight_type, f.airport_icao, cast(f.first_seen as varchar))) as flight_id,
     f.icao24,
     f.callsign,
     f.flight_type,
@@ -24,6 +47,7 @@ select
     f.first_seen_ts_utc,
     f.last_seen_ts_utc,
     f.event_hour_utc,
+    f.event_day_utc,
     date_diff('minute', f.first_seen_ts_utc, f.last_seen_ts_utc) as flight_duration_min,
     extract('hour' from f.event_hour_utc) as hour_of_day_utc,
     extract('dow' from f.event_hour_utc) as day_of_week_utc,
@@ -37,10 +61,27 @@ select
     f.cloud_cover,
     a.country_code as airport_country_code,
     concat(f.est_departure_airport, '-', f.est_arrival_airport) as route_code,
-    coalesce(h.is_holiday, false) as is_holiday
+    coalesce(h.is_holiday, false) as is_holiday,
+    t.movements_count as airport_movements_hour,
+    t.departures_count as airport_departures_hour,
+    t.arrivals_count as airport_arrivals_hour,
+    t.movements_prev_1h as airport_movements_prev_1h,
+    t.movements_prev_3h as airport_movements_prev_3h,
+    t.departures_prev_3h as airport_departures_prev_3h,
+    t.arrivals_prev_3h as airport_arrivals_prev_3h,
+    t.movements_prev_24h as airport_movements_prev_24h,
+    r.flights_count as route_flights_day,
+    r.flights_prev_7d as route_flights_prev_7d
 from flights f
 left join airports a
     on a.icao = f.airport_icao
 left join holidays h
     on h.country_code = a.country_code
    and h.holiday_date = cast(f.event_hour_utc as date)
+left join traffic t
+    on t.airport_icao = f.airport_icao
+   and t.event_hour_utc = f.event_hour_utc
+left join routes r
+    on r.route_code = concat(f.est_departure_airport, '-', f.est_arrival_airport)
+   and r.event_day_utc = f.event_day_utc
+order by f.event_hour_utc, f.icao24, f.callsign
@@ -6,10 +6,21 @@ with flights as (
 select
     date_trunc('day', event_hour_utc) as day_utc,
     count(*) as flights_total,
+    count(*) filter (where weather_offset_hours = 0) as flights_with_exact_weather,
+    count(*) filter (where weather_offset_hours <> 0) as flights_with_filled_weather,
     count(*) filter (where temperature_2m is not null) as flights_with_weather,
+    round(
+        100.0 * count(*) filter (where weather_offset_hours = 0) / nullif(count(*), 0),
+        2
+    ) as pct_exact_weather,
     round(
         100.0 * count(*) filter (where temperature_2m is not null) / nullif(count(*), 0),
         2
-    ) as pct_with_weather
+    ) as pct_with_weather,
+    round(
+        100.0 * count(*) filter (where weather_offset_hours <> 0) / nullif(count(*), 0),
+        2
+    ) as pct_gain_from_fill,
+    max(abs(weather_offset_hours)) as max_offset_hours
 from flights
 group by 1
@@ -1,9 +1,50 @@
+{{
+    config(
+        unique_key='event_day_utc'
+    )
+}}
+
 with raw as (
+{% if var("raw_format", "json") == "parquet" %}
+    select
+        *,
+        day as ingest_day
+    from read_parquet(
+        '{{ var("parquet_dir", "../data/parquet") }}/opensky/*/*.parquet',
+        hive_partitioning=true,
+        hive_types={'day': 'DATE'}
+    )
+    where {{ incremental_day_filter('day', 'event_day_utc') }}
+{% else %}
     select *
-    from read_json_auto(
-        '{{ var("raw_dir", "../data/raw") }}/opensky/*/*.jsonl',
-        union_by_name=true
+    from (
+        select
+            *,
+            {{ raw_partition_day('filename') }} as ingest_day
+        from read_json(
+            '{{ var("raw_dir", "../data/raw") }}/opensky/*/*.jsonl',
+            format='newline_delimited',
+            filename=true,
+            columns={
+                icao24: 'VARCHAR',
+                callsign: 'VARCHAR',
+                estDepartureAirport: 'VARCHAR',
+                estArrivalAirport: 'VARCHAR',
+                firstSeen: 'BIGINT',
+                lastSeen: 'BIGINT',
+                estDepartureAirportHorizDistance: 'BIGINT',
+                estDepartureAirportVertDistance: 'BIGINT',
+                estArrivalAirportHorizDistance: 'BIGINT',
+                estArrivalAirportVertDistance: 'BIGINT',
+                departureAirportCandidatesCount: 'BIGINT',
+                arrivalAirportCandidatesCount: 'BIGINT',
+                flight_type: 'VARCHAR',
+                airport_icao: 'VARCHAR'
+            }
+        )
     )
+    where {{ incremental_day_filter('ingest_day', 'event_day_utc') }}
+{% endif %}
 )
 
 select
@@ -24,5 +65,10 @@ select
     to_timestamp(firstSeen) as first_seen_ts_utc,
     to_timestamp(lastSeen) as last_seen_ts_utc,
     date_trunc('hour', to_timestamp(firstSeen)) as first_seen_hour_utc,
-    date_trunc('hour', to_timestamp(lastSeen)) as last_seen_hour_utc
+    date_trunc('hour', to_timestamp(lastSeen)) as last_seen_hour_utc,
+    date_trunc(
+        'hour',
+        to_timestamp(case when flight_type = 'departure' then firstSeen else lastSeen end)
+    ) as event_hour_utc,
+    ingest_day as event_day_utc
 from raw
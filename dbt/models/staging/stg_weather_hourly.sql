@@ -1,38 +1,79 @@
+{{
+    config(
+        unique_key='day_utc'
+    )
+}}
+
+{% if var("raw_format", "json") == "parquet" %}
+select
+    airport_icao,
+    coalesce(timezone, 'UTC') as timezone,
+    strptime(time_local, '%Y-%m-%dT%H:%M') as time_local,
+    cast(time_utc as timestamp) as time_utc,
+    temperature_2m,
+    precipitation,
+    wind_speed_10m,
+    cloud_cover,
+    day as day_utc
+from read_parquet(
+    '{{ var("parquet_dir", "../data/parquet") }}/weather/*/*.parquet',
+    hive_partitioning=true,
+    hive_types={'day': 'DATE'}
+)
+where {{ incremental_day_filter('day', 'day_utc') }}
+order by airport_icao, time_utc
+{% else %}
 with raw as (
     select *
-    from read_json_auto(
-        '{{ var("raw_dir", "../data/raw") }}/weather/*/*.json',
-        union_by_name=true
+    from (
+        select
+            *,
+            {{ raw_partition_day('filename') }} as ingest_day
+        from read_json(
+            '{{ var("raw_dir", "../data/raw") }}/weather/*/*.json',
+            format='auto',
+            filename=true,
+            timestampformat='%Y-%m-%dT%H:%M',
+            columns={
+                airport_icao: 'VARCHAR',
+                timezone: 'VARCHAR',
+                utc_offset_seconds: 'INTEGER',
+                hourly: 'STRUCT(
+                    time TIMESTAMP[],
+                    temperature_2m DOUBLE[],
+                    precipitation DOUBLE[],
+                    wind_speed_10m DOUBLE[],
+                    cloud_cover DOUBLE[]
+                )'
+            }
+        )
     )
+    where {{ incremental_day_filter('ingest_day', 'day_utc') }}
 ),
-expanded as (
+flat as (
     select
         airport_icao,
         timezone,
-        hourly.time as time_list,
-        hourly.temperature_2m as temperature_2m_list,
-        hourly.precipitation as precipitation_list,
-        hourly.wind_speed_10m as wind_speed_10m_list,
-        hourly.cloud_cover as cloud_cover_list
+        utc_offset_seconds,
+        ingest_day,
+        unnest(hourly.time) as time_local,
+        unnest(hourly.temperature_2m) as temperature_2m,
+        unnest(hourly.precipitation) as precipitation,
+        unnest(hourly.wind_speed_10m) as wind_speed_10m,
+        unnest(hourly.cloud_cover) as cloud_cover
     from raw
 )
 
 select
     airport_icao,
     coalesce(timezone, 'UTC') as timezone,
-    struct_extract(z, 1) as time_local,
-    strptime(struct_extract(z, 1), '%Y-%m-%dT%H:%M') as time_utc,
-    struct_extract(z, 2) as temperature_2m,
-    struct_extract(z, 3) as precipitation,
-    struct_extract(z, 4) as wind_speed_10m,
-    struct_extract(z, 5) as cloud_cover
-from expanded,
-    unnest(
-        list_zip(
-            time_list,
-            temperature_2m_list,
-            precipitation_list,
-            wind_speed_10m_list,
-            cloud_cover_list
-        )
-    ) as t(z)
+    time_local,
+    time_local - to_seconds(coalesce(utc_offset_seconds, 0)) as time_utc,
+    temperature_2m,
+    precipitation,
+    wind_speed_10m,
+    cloud_cover,
+    ingest_day as day_utc
+from flat
+order by airport_icao, time_utc
+{% endif %}
@@ -1,29 +1,80 @@
 import argparse
+import json
+import os
 from pathlib import Path
 
 import pandas as pd
-import requests
 
-from utils import ensure_dir
+from utils import close_http_session, ensure_dir, http_session
 
 
 OURAIRPORTS_URL = "https://ourairports.com/data/airports.csv"
+SOURCE_COLUMNS = ["continent", "icao_code", "latitude_deg", "longitude_deg", "timezone", "iso_country"]
+SOURCE_DTYPES = {
+    "continent": "category",
+    "icao_code": "string",
+    "latitude_deg": "float64",
+    "longitude_deg": "float64",
+    "timezone": "string",
+    "iso_country": "category",
+}
+CHUNK_ROWS = 50_000
+
+
+def read_cache_meta(meta_path: Path) -> dict:
+    if not meta_path.exists():
+        return {}
+    with meta_path.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def download_if_changed(url: str, cache_path: Path, force: bool = False):
+    meta_path = cache_path.with_name(cache_path.name + ".meta.json")
+    meta = read_cache_meta(meta_path)
+    headers = {}
+    if not force and cache_path.exists() and meta.get("url") == url:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    with http_session().get(url, headers=headers, timeout=60, stream=True) as response:
+        if response.status_code == 304:
+            return cache_path, False
+        response.raise_for_status()
+        ensure_dir(cache_path.parent)
+        tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+        with tmp_path.open("wb") as f:
+            for chunk in response.iter_content(chunk_size=1 << 20):
+                f.write(chunk)
+        os.replace(tmp_path, cache_path)
+        meta = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "bytes": cache_path.stat().st_size,
+        }
+    with meta_path.open("w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return cache_path, True
 
 
-def download_csv(url: str) -> pd.DataFrame:
-    response = requests.get(url, timeout=60)
-    response.raise_for_status()
-    return pd.read_csv(pd.io.common.StringIO(response.text))
+def read_europe(csv_path: Path) -> pd.DataFrame:
+    chunks = pd.read_csv(
+        csv_path,
+        usecols=lambda c: c in SOURCE_COLUMNS,
+        dtype=SOURCE_DTYPES,
+        chunksize=CHUNK_ROWS,
+    )
+    return pd.concat([filter_europe(chunk) for chunk in chunks], ignore_index=True)
 
 
 def filter_europe(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df = df[df["continent"] == "EU"]
-    df = df[df["icao_code"].notna()]
-    df = df[df["latitude_deg"].notna() & df["longitude_deg"].notna()]
+    mask = (df["continent"] == "EU") & df["icao_code"].notna()
+    mask &= df["latitude_deg"].notna() & df["longitude_deg"].notna()
     if "timezone" in df.columns:
-        df = df[df["timezone"].notna()]
-    return df
+        mask &= df["timezone"].notna()
+    return df[mask]
 
 
 def to_reference_schema(df: pd.DataFrame) -> pd.DataFrame:
@@ -50,16 +101,30 @@ def main():
         default="data/reference/airports_eu.csv",
         help="Output CSV path",
     )
+    parser.add_argument(
+        "--cache",
+        default="data/reference/_cache/ourairports_airports.csv",
+        help="Local copy of the OurAirports CSV (revalidated with ETag/Last-Modified)",
+    )
+    parser.add_argument("--url", default=OURAIRPORTS_URL)
+    parser.add_argument("--force", action="store_true", help="Download and rebuild even if unchanged")
     args = parser.parse_args()
 
-    df = download_csv(OURAIRPORTS_URL)
-    df = filter_europe(df)
-    out_df = to_reference_schema(df)
-
     output_path = Path(args.output)
+    try:
+        cache_path, changed = download_if_changed(args.url, Path(args.cache), args.force)
+    finally:
+        close_http_session()
+    if not changed and output_path.exists() and output_path.stat().st_mtime >= cache_path.stat().st_mtime:
+        print("OurAirports inchange (304): {} conserve".format(output_path))
+        return
+
+    out_df = to_reference_schema(read_europe(cache_path))
     ensure_dir(output_path.parent)
-    out_df.to_csv(output_path, index=False)
-    print("Wrote {}".format(output_path))
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    out_df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, output_path)
+    print("Wrote {} ({} aeroports)".format(output_path, len(out_df)))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,148 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+
+COLUMNS = ("icao", "latitude", "longitude", "timezone", "country_code")
+DTYPES = {
+    "icao": "string",
+    "latitude": "float64",
+    "longitude": "float64",
+    "timezone": "string",
+    "country_code": "string",
+}
+
+
+class Airport(NamedTuple):
+    icao: str
+    latitude: float
+    longitude: float
+    timezone: str | None
+    country_code: str | None
+
+
+class AirportIndex:
+    def __init__(self, icao, latitude=None, longitude=None, timezone=None, country_code=None):
+        given = (icao, latitude, longitude, timezone, country_code)
+        self.columns = tuple(name for name, values in zip(COLUMNS, given) if values is not None)
+        self.icao = np.asarray(icao, dtype=object)
+        size = len(self.icao)
+        self.latitude = _floats(latitude, size)
+        self.longitude = _floats(longitude, size)
+        self.timezone = _objects(timezone, size)
+        self.country_code = _objects(country_code, size)
+        self._positions = None
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "AirportIndex":
+        columns = {}
+        for name in COLUMNS:
+            if name not in df.columns:
+                continue
+            series = df[name]
+            if DTYPES[name] == "string":
+                columns[name] = series.astype(object).where(series.notna(), None).to_numpy()
+            else:
+                columns[name] = series.to_numpy(dtype=np.float64)
+        return cls(**columns)
+
+    @property
+    def positions(self) -> dict:
+        if self._positions is None:
+            self._positions = {code: i for i, code in enumerate(self.icao.tolist())}
+        return self._positions
+
+    @property
+    def codes(self) -> list:
+        return self.icao.tolist()
+
+    def __len__(self) -> int:
+        return len(self.icao)
+
+    def __contains__(self, icao) -> bool:
+        return icao in self.positions
+
+    def __iter__(self):
+        return map(
+            Airport._make,
+            zip(
+                self.icao.tolist(),
+                self.latitude.tolist(),
+                self.longitude.tolist(),
+                self.timezone.tolist(),
+                self.country_code.tolist(),
+            ),
+        )
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return Airport(
+                self.icao[key],
+                float(self.latitude[key]),
+                float(self.longitude[key]),
+                self.timezone[key],
+                self.country_code[key],
+            )
+        return AirportIndex(**{name: getattr(self, name)[key] for name in self.columns})
+
+    def get(self, icao: str) -> Airport | None:
+        position = self.positions.get(icao)
+        return None if position is None else self[position]
+
+    def subset(self, codes) -> "AirportIndex":
+        upper = {code.upper(): i for i, code in enumerate(self.icao.tolist())}
+        wanted = [code.strip().upper() for code in codes if code.strip()]
+        unknown = sorted(set(wanted).difference(upper))
+        if unknown:
+            raise ValueError("Aeroports absents de airports_eu.csv: {}".format(unknown))
+        return self[np.array(sorted({upper[code] for code in wanted}), dtype=np.intp)]
+
+    def require(self, *columns):
+        missing = [name for name in columns if name not in self.columns]
+        if missing:
+            raise ValueError("Colonnes manquantes dans airports_eu.csv: {}".format(sorted(missing)))
+        valid = np.ones(len(self), dtype=bool)
+        for name in columns:
+            values = getattr(self, name)
+            if values.dtype == np.float64:
+                valid &= ~np.isnan(values)
+            else:
+                valid &= np.array([v is not None for v in values.tolist()], dtype=bool)
+        return self if valid.all() else self[valid]
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({name: getattr(self, name) for name in self.columns})
+
+
+def _floats(values, size: int):
+    if values is None:
+        return np.full(size, np.nan)
+    return np.asarray(values, dtype=np.float64)
+
+
+def _objects(values, size: int):
+    if values is None:
+        return np.full(size, None, dtype=object)
+    return np.asarray(values, dtype=object)
+
+
+@lru_cache(maxsize=8)
+def _load(path: str, mtime_ns: int) -> AirportIndex:
+    df = pd.read_csv(
+        path,
+        usecols=lambda c: c in COLUMNS,
+        dtype=DTYPES,
+    )
+    if "icao" not in df.columns:
+        raise ValueError("airports_eu.csv doit contenir la colonne 'icao'")
+    df = df.dropna(subset=["icao"]).drop_duplicates(subset=["icao"])
+    return AirportIndex.from_frame(df)
+
+
+def load_airports(airports_file: str, required=("icao",)) -> AirportIndex:
+    path = Path(airports_file).resolve()
+    airports = _load(str(path), path.stat().st_mtime_ns)
+    return airports.require(*required)
@@ -0,0 +1,346 @@
+import argparse
+import copy
+import datetime as dt
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import yaml
+
+from airports_ref import load_airports
+from utils import build_date_args, load_config, resolve_dates
+
+
+INGESTION_DIR = Path(__file__).resolve().parent
+DBT_DIR = INGESTION_DIR.parent / "dbt"
+SOURCES = ["opensky", "weather"]
+SCRIPTS = {"opensky": "opensky_fetch.py", "weather": "weather_fetch.py"}
+
+
+def split_days(start: dt.date, end: dt.date, shard_days: int):
+    spans = []
+    current = start
+    while current <= end:
+        last = min(end, current + dt.timedelta(days=shard_days - 1))
+        spans.append((current, last))
+        current = last + dt.timedelta(days=1)
+    return spans
+
+
+def split_airports(codes, shards: int):
+    shards = max(1, min(shards, len(codes)))
+    size = math.ceil(len(codes) / shards)
+    return [codes[i : i + size] for i in range(0, len(codes), size)]
+
+
+def opensky_accounts(config: dict):
+    opensky = config.get("opensky") or {}
+    accounts = opensky.get("accounts") or []
+    if accounts:
+        return accounts
+    return [{k: opensky[k] for k in ("oauth", "username", "password") if opensky.get(k)}]
+
+
+def apply_account(config: dict, account: dict) -> dict:
+    shard_config = copy.deepcopy(config)
+    opensky = shard_config.setdefault("opensky", {})
+    opensky.pop("accounts", None)
+    for key in ("oauth", "username", "password"):
+        opensky.pop(key, None)
+    opensky.update(account)
+    return shard_config
+
+
+def build_shards(args, start: dt.date, end: dt.date, codes):
+    spans = split_days(start, end, args.shard_days)
+    groups = split_airports(codes, args.airport_shards)
+    shards = []
+    for source in args.sources:
+        for span_start, span_end in spans:
+            for group_idx, group in enumerate(groups):
+                shards.append(
+                    {
+                        "id": "{}_{}_{}_a{}".format(
+                            source, span_start.isoformat(), span_end.isoformat(), group_idx
+                        ),
+                        "source": source,
+                        "start": span_start,
+                        "end": span_end,
+                        "airports": group,
+                    }
+                )
+    shards.sort(key=lambda s: (s["start"], s["source"], s["id"]))
+    return shards
+
+
+def assign_budgets(args, shards, accounts):
+    running = {
+        source: min(args.processes, sum(1 for s in shards if s["source"] == source))
+        for source in SOURCES
+    }
+    per_account = math.ceil(running["opensky"] / len(accounts)) if running["opensky"] else 1
+    opensky_idx = 0
+    for shard in shards:
+        if shard["source"] == "opensky":
+            shard["account"] = opensky_idx % len(accounts)
+            shard["rate"] = args.rate / per_account
+            opensky_idx += 1
+        else:
+            shard["sleep"] = args.weather_sleep * max(1, running["weather"])
+
+
+def shard_command(args, shard: dict, config_path: Path):
+    cmd = [
+        sys.executable,
+        str(INGESTION_DIR / SCRIPTS[shard["source"]]),
+        "--config", str(config_path),
+        "--start", shard["start"].isoformat(),
+        "--end", shard["end"].isoformat(),
+        "--airports", ",".join(shard["airports"]),
+    ]
+    if shard["source"] == "opensky":
+        cmd += ["--workers", str(args.workers), "--rate", "{:g}".format(shard["rate"])]
+    else:
+        cmd += [
+            "--sleep", "{:g}".format(shard["sleep"]),
+            "--batched", "--batch-days", str(args.shard_days),
+        ]
+    if args.format:
+        cmd += ["--format", args.format]
+    if args.only_missing:
+        cmd.append("--only-missing")
+    if args.refresh_older_than is not None:
+        cmd += ["--refresh-older-than", "{:g}".format(args.refresh_older_than)]
+    return cmd
+
+
+def run_shard(cmd, log_path: Path):
+    started = time.perf_counter()
+    with log_path.open("w", encoding="utf-8") as log:
+        log.write(" ".join(cmd) + "\n\n")
+        log.flush()
+        completed = subprocess.run(cmd, stdout=log, stderr=subprocess.STDOUT)
+    return completed.returncode, round(time.perf_counter() - started, 3)
+
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return "{:d}h{:02d}m{:02d}s".format(hours, minutes, seconds)
+
+
+def write_account_configs(config: dict, accounts):
+    paths = []
+    try:
+        for idx, account in enumerate(accounts):
+            fd, path = tempfile.mkstemp(prefix="backfill_account_{}_".format(idx), suffix=".yaml")
+            paths.append(Path(path))
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                yaml.safe_dump(apply_account(config, account), f)
+    except BaseException:
+        remove_files(paths)
+        raise
+    return paths
+
+
+def remove_files(paths):
+    for path in paths:
+        path.unlink(missing_ok=True)
+
+
+def run_shards(args, config: dict, shards, accounts, run_dir: Path):
+    (run_dir / "logs").mkdir(parents=True, exist_ok=True)
+    needs_accounts = any(shard["source"] == "opensky" for shard in shards)
+    account_configs = write_account_configs(config, accounts) if needs_accounts else []
+    try:
+        return run_shard_pool(args, shards, account_configs, run_dir)
+    finally:
+        remove_files(account_configs)
+
+
+def run_shard_pool(args, shards, account_configs, run_dir: Path):
+    started = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=args.processes)
+    try:
+        futures = {}
+        for shard in shards:
+            if shard["source"] == "opensky":
+                config_path = account_configs[shard["account"]]
+            else:
+                config_path = Path(args.config)
+            cmd = shard_command(args, shard, config_path)
+            shard["log"] = str(run_dir / "logs" / "{}.log".format(shard["id"]))
+            futures[executor.submit(run_shard, cmd, Path(shard["log"]))] = shard
+        for done, future in enumerate(as_completed(futures), start=1):
+            shard = futures[future]
+            shard["returncode"], shard["seconds"] = future.result()
+            elapsed = time.perf_counter() - started
+            eta = elapsed / done * (len(shards) - done)
+            print(
+                "[{}/{}] {} {}..{} ({} aeroports): {} en {:.1f}s - ecoule {}, reste ~{}".format(
+                    done,
+                    len(shards),
+                    shard["source"],
+                    shard["start"],
+                    shard["end"],
+                    len(shard["airports"]),
+                    "ok" if shard["returncode"] == 0 else "ECHEC (voir {})".format(shard["log"]),
+                    shard["seconds"],
+                    format_duration(elapsed),
+                    format_duration(eta),
+                ),
+                flush=True,
+            )
+    except BaseException:
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown(wait=True)
+    return round(time.perf_counter() - started, 3)
+
+
+def collect_fetch_metrics(raw_dir: Path, since: float):
+    totals = {}
+    metrics_dir = raw_dir / "_metrics"
+    if not metrics_dir.exists():
+        return totals
+    for path in sorted(metrics_dir.glob("*.json")):
+        if path.stat().st_mtime < since:
+            continue
+        with path.open("r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+        source = totals.setdefault(snapshot["source"], {"runs": 0, "units": {}})
+        source["runs"] += 1
+        for key in ("requests", "rate_limited", "retries", "errors", "bytes_received"):
+            source[key] = source.get(key, 0) + snapshot.get(key, 0)
+        for status, count in (snapshot.get("units") or {}).items():
+            source["units"][status] = source["units"].get(status, 0) + count
+    return totals
+
+
+def dbt_vars(config: dict, args, start: dt.date, end: dt.date) -> dict:
+    storage = config["storage"]
+    dbt_vars = {
+        "start_day": start.isoformat(),
+        "end_day": end.isoformat(),
+        "raw_dir": str(Path(storage["raw_dir"]).resolve()),
+        "parquet_dir": str(Path(storage.get("parquet_dir", "data/parquet")).resolve()),
+        "raw_format": args.format or storage.get("format", "json"),
+    }
+    if storage.get("reference_dir"):
+        dbt_vars["reference_dir"] = str(Path(storage["reference_dir"]).resolve())
+    return dbt_vars
+
+
+def run_dbt(args, config: dict, start: dt.date, end: dt.date, log_path: Path):
+    dbt = shutil.which("dbt")
+    if dbt is None:
+        raise RuntimeError("dbt introuvable dans le PATH (pip install dbt-duckdb)")
+    cmd = [dbt, "build", "--vars", json.dumps(dbt_vars(config, args, start, end))]
+    if args.profiles_dir:
+        cmd += ["--profiles-dir", str(Path(args.profiles_dir).resolve())]
+    if args.dbt_target:
+        cmd += ["--target", args.dbt_target]
+    started = time.perf_counter()
+    with log_path.open("w", encoding="utf-8") as log:
+        log.write(" ".join(cmd) + "\n\n")
+        log.flush()
+        completed = subprocess.run(cmd, cwd=DBT_DIR, stdout=log, stderr=subprocess.STDOUT)
+    return completed.returncode, round(time.perf_counter() - started, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel backfill: sharded fetchers then dbt build")
+    build_date_args(parser)
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--sources", default=",".join(SOURCES), help="Comma-separated subset of " + ",".join(SOURCES))
+    parser.add_argument("--shard-days", type=int, default=7, help="Days per shard")
+    parser.add_argument("--airport-shards", type=int, default=1, help="Airport groups per date span")
+    parser.add_argument("--processes", type=int, default=4, help="Shards running at the same time")
+    parser.add_argument("--workers", type=int, default=4, help="OpenSky threads per shard")
+    parser.add_argument("--rate", type=float, default=1.0, help="OpenSky requests/s per account (shared by its shards)")
+    parser.add_argument("--weather-sleep", type=float, default=1.0, help="Open-Meteo delay between calls (all shards)")
+    parser.add_argument("--format", choices=["json", "parquet"], default=None)
+    parser.add_argument("--only-missing", action="store_true")
+    parser.add_argument("--refresh-older-than", type=float, default=None, metavar="DAYS")
+    parser.add_argument("--skip-dbt", action="store_true", help="Only run the fetchers")
+    parser.add_argument("--dbt-on-failure", action="store_true", help="Run dbt even if some shards failed")
+    parser.add_argument("--profiles-dir", default=None, help="dbt profiles dir (default: dbt lookup)")
+    parser.add_argument("--dbt-target", default=None)
+    args = parser.parse_args()
+
+    args.sources = [s.strip() for s in args.sources.split(",") if s.strip()]
+    unknown = sorted(set(args.sources).difference(SOURCES))
+    if unknown:
+        raise SystemExit("Sources inconnues: {}".format(unknown))
+    if args.shard_days < 1 or args.processes < 1:
+        raise SystemExit("--shard-days et --processes doivent etre >= 1")
+
+    config = load_config(args.config)
+    start, end = resolve_dates(args, config)
+    codes = load_airports(config["airports"]["file"]).codes
+    if not codes:
+        raise SystemExit("Aucun aeroport dans {}".format(config["airports"]["file"]))
+    accounts = opensky_accounts(config)
+    shards = build_shards(args, start, end, codes)
+    assign_budgets(args, shards, accounts)
+
+    raw_dir = Path(config["storage"]["raw_dir"])
+    stamp = dt.datetime.now(dt.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    run_dir = raw_dir / "_backfill" / stamp
+    print(
+        "Backfill {}..{}: {} shards ({} aeroports, {} compte(s) OpenSky, {} en parallele) -> {}".format(
+            start, end, len(shards), len(codes), len(accounts), args.processes, run_dir
+        )
+    )
+
+    since = time.time()
+    fetch_seconds = run_shards(args, config, shards, accounts, run_dir)
+    failed = [s for s in shards if s["returncode"] != 0]
+
+    summary = {
+        "started_at": stamp,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "params": vars(args),
+        "fetch_seconds": fetch_seconds,
+        "shards": [
+            dict(s, start=s["start"].isoformat(), end=s["end"].isoformat(), airports=len(s["airports"]))
+            for s in shards
+        ],
+        "failed": len(failed),
+        "fetch_metrics": collect_fetch_metrics(raw_dir, since),
+        "dbt": None,
+    }
+
+    if failed and not args.dbt_on_failure and not args.skip_dbt:
+        print("dbt non lance: {} shards en echec".format(len(failed)))
+    elif not args.skip_dbt:
+        print("dbt build {}..{}".format(start, end), flush=True)
+        returncode, seconds = run_dbt(args, config, start, end, run_dir / "logs" / "dbt_build.log")
+        summary["dbt"] = {"returncode": returncode, "seconds": seconds}
+        print("dbt: {} en {:.1f}s".format("ok" if returncode == 0 else "ECHEC", seconds))
+
+    summary_path = run_dir / "summary.json"
+    with summary_path.open("w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, default=str)
+    print("Resume: {}".format(summary_path))
+
+    if failed:
+        raise SystemExit(
+            "{} shards en echec: relancer avec --only-missing (logs: {})".format(
+                len(failed), run_dir / "logs"
+            )
+        )
+    if summary["dbt"] and summary["dbt"]["returncode"] != 0:
+        raise SystemExit("dbt build en echec: voir {}".format(run_dir / "logs" / "dbt_build.log"))
+
+
+if __name__ == "__main__":
+    main()
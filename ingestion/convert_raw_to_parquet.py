@@ -0,0 +1,65 @@
+import argparse
+import json
+from pathlib import Path
+
+from parquet_sink import opensky_table, partition_path, weather_table, write_table
+from utils import load_config
+
+
+def read_jsonl(path: Path):
+    with path.open("r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def convert_opensky(raw_dir: Path, parquet_dir: Path, overwrite: bool) -> int:
+    converted = 0
+    for path in sorted((raw_dir / "opensky").glob("*/*.jsonl")):
+        day = path.parent.name
+        output_path = partition_path(parquet_dir, "opensky", day, path.stem)
+        if output_path.exists() and not overwrite:
+            continue
+        write_table(opensky_table(read_jsonl(path)), output_path)
+        converted += 1
+    return converted
+
+
+def convert_weather(raw_dir: Path, parquet_dir: Path, overwrite: bool) -> int:
+    converted = 0
+    for path in sorted((raw_dir / "weather").glob("*/*.json")):
+        day = path.parent.name
+        output_path = partition_path(parquet_dir, "weather", day, path.stem)
+        if output_path.exists() and not overwrite:
+            continue
+        with path.open("r", encoding="utf-8") as f:
+            payload = json.load(f)
+        payload.setdefault("airport_icao", path.stem)
+        write_table(weather_table(payload), output_path)
+        converted += 1
+    return converted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert raw JSON tree to Hive-partitioned Parquet")
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument(
+        "--source",
+        choices=["opensky", "weather", "all"],
+        default="all",
+    )
+    parser.add_argument("--overwrite", action="store_true", help="Rewrite existing Parquet files")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    raw_dir = Path(config["storage"]["raw_dir"])
+    parquet_dir = Path(config["storage"].get("parquet_dir", "data/parquet"))
+
+    if args.source in ("opensky", "all"):
+        count = convert_opensky(raw_dir, parquet_dir, args.overwrite)
+        print("OpenSky: {} fichiers convertis".format(count))
+    if args.source in ("weather", "all"):
+        count = convert_weather(raw_dir, parquet_dir, args.overwrite)
+        print("Meteo: {} fichiers convertis".format(count))
+
+
+if __name__ == "__main__":
+    main()
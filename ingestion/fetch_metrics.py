@@ -0,0 +1,94 @@
+import datetime as dt
+import json
+import os
+import threading
+from pathlib import Path
+
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class FetchMetrics:
+    def __init__(self, source: str):
+        self.source = source
+        self.started_at = dt.datetime.now(dt.timezone.utc)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.status_counts = {}
+        self.rate_limited = 0
+        self.retries = 0
+        self.errors = 0
+        self.bytes_received = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.latency_buckets = [0] * len(LATENCY_BUCKETS)
+        self.units = {"done": 0, "failed": 0, "skipped": 0}
+
+    def record_response(self, status_code: int, size: int, seconds: float):
+        with self._lock:
+            self.requests += 1
+            key = str(status_code)
+            self.status_counts[key] = self.status_counts.get(key, 0) + 1
+            if status_code == 429:
+                self.rate_limited += 1
+            self.bytes_received += size
+            self.latency_sum += seconds
+            self.latency_max = max(self.latency_max, seconds)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    self.latency_buckets[i] += 1
+
+    def record_error(self):
+        with self._lock:
+            self.requests += 1
+            self.errors += 1
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def record_units(self, status: str, count: int = 1):
+        with self._lock:
+            self.units[status] = self.units.get(status, 0) + count
+
+    def snapshot(self) -> dict:
+        finished_at = dt.datetime.now(dt.timezone.utc)
+        with self._lock:
+            answered = self.requests - self.errors
+            return {
+                "source": self.source,
+                "started_at": self.started_at.isoformat(),
+                "finished_at": finished_at.isoformat(),
+                "elapsed_s": round((finished_at - self.started_at).total_seconds(), 3),
+                "requests": self.requests,
+                "status_counts": dict(self.status_counts),
+                "rate_limited": self.rate_limited,
+                "retries": self.retries,
+                "errors": self.errors,
+                "bytes_received": self.bytes_received,
+                "latency_s": {
+                    "mean": round(self.latency_sum / answered, 4) if answered else None,
+                    "max": round(self.latency_max, 4),
+                    "buckets": {
+                        f"le_{bound:g}": count
+                        for bound, count in zip(LATENCY_BUCKETS, self.latency_buckets)
+                    },
+                },
+                "units": dict(self.units),
+            }
+
+    def write(self, raw_dir: str) -> Path:
+        snapshot = self.snapshot()
+        out_dir = Path(raw_dir) / "_metrics"
+        out_dir.mkdir(parents=True, exist_ok=True)
+        stamp = self.started_at.strftime("%Y%m%dT%H%M%SZ")
+        output_path = out_dir / f"{self.source}_{stamp}_{os.getpid()}.json"
+        with output_path.open("w", encoding="utf-8") as f:
+            json.dump(snapshot, f, indent=2)
+        return output_path
+
+
+def count_retry(retry_state):
+    metrics = retry_state.kwargs.get("metrics")
+    if metrics is not None:
+        metrics.record_retry()
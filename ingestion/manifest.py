@@ -0,0 +1,157 @@
+import datetime as dt
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+
+
+MANIFEST_FILE = "_manifest.sqlite"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+def file_checksum(path: Path) -> str:
+    digest = hashlib.sha256()
+    with Path(path).open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _utcnow() -> dt.datetime:
+    return dt.datetime.now(dt.timezone.utc).replace(microsecond=0)
+
+
+class FetchManifest:
+    def __init__(self, raw_dir: str):
+        path = Path(raw_dir) / MANIFEST_FILE
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(str(path), timeout=60, check_same_thread=False)
+        self._con.execute("pragma journal_mode=wal")
+        self._con.execute(
+            """
+            create table if not exists fetch_manifest (
+                source text not null,
+                airport_icao text not null,
+                day text not null,
+                flight_type text not null default '',
+                status text not null,
+                row_count integer,
+                checksum text,
+                output_path text,
+                error text,
+                attempts integer not null default 0,
+                fetched_at text not null,
+                primary key (source, airport_icao, day, flight_type)
+            )
+            """
+        )
+        self._con.commit()
+
+    def close(self):
+        with self._lock:
+            self._con.close()
+
+    def get(self, source: str, airport: str, day: str, flight_type: str = ""):
+        with self._lock:
+            return self._con.execute(
+                """
+                select status, row_count, checksum, output_path, fetched_at
+                from fetch_manifest
+                where source = ? and airport_icao = ? and day = ? and flight_type = ?
+                """,
+                (source, airport, str(day), flight_type),
+            ).fetchone()
+
+    def needs_fetch(
+        self,
+        source: str,
+        airport: str,
+        day: str,
+        flight_type: str = "",
+        refresh_older_than: float | None = None,
+        expected_path: Path | None = None,
+    ) -> bool:
+        row = self.get(source, airport, day, flight_type)
+        if row is None:
+            return True
+        status, _, _, output_path, fetched_at = row
+        if status != STATUS_DONE:
+            return True
+        if output_path and not Path(output_path).exists():
+            return True
+        if expected_path is not None and output_path != str(expected_path):
+            return True
+        if refresh_older_than is not None:
+            cutoff = _utcnow() - dt.timedelta(days=refresh_older_than)
+            return dt.datetime.fromisoformat(fetched_at) < cutoff
+        return False
+
+    def mark_done(
+        self,
+        source: str,
+        airport: str,
+        day: str,
+        flight_type: str,
+        row_count: int,
+        output_path: Path,
+    ):
+        self._upsert(
+            source,
+            airport,
+            day,
+            flight_type,
+            STATUS_DONE,
+            row_count,
+            file_checksum(output_path),
+            str(output_path),
+            None,
+        )
+
+    def mark_failed(self, source: str, airport: str, day: str, flight_type: str, error: str):
+        self._upsert(source, airport, day, flight_type, STATUS_FAILED, None, None, None, error)
+
+    def _upsert(self, source, airport, day, flight_type, status, row_count, checksum, output_path, error):
+        with self._lock:
+            self._con.execute(
+                """
+                insert into fetch_manifest (
+                    source, airport_icao, day, flight_type, status, row_count,
+                    checksum, output_path, error, attempts, fetched_at
+                )
+                values (?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?)
+                on conflict (source, airport_icao, day, flight_type) do update set
+                    status = excluded.status,
+                    row_count = excluded.row_count,
+                    checksum = coalesce(excluded.checksum, fetch_manifest.checksum),
+                    output_path = coalesce(excluded.output_path, fetch_manifest.output_path),
+                    error = excluded.error,
+                    attempts = fetch_manifest.attempts + 1,
+                    fetched_at = excluded.fetched_at
+                """,
+                (
+                    source,
+                    airport,
+                    str(day),
+                    flight_type,
+                    status,
+                    row_count,
+                    checksum,
+                    output_path,
+                    error,
+                    _utcnow().isoformat(),
+                ),
+            )
+            self._con.commit()
+
+    def summary(self, source: str | None = None):
+        query = "select source, status, count(*), sum(row_count) from fetch_manifest"
+        params = ()
+        if source:
+            query += " where source = ?"
+            params = (source,)
+        query += " group by 1, 2 order by 1, 2"
+        with self._lock:
+            return self._con.execute(query, params).fetchall()
@@ -1,25 +1,99 @@
 import argparse
 import json
+import math
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 import pandas as pd
 import requests
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 
-from utils import build_date_args, ensure_dir, load_config, resolve_dates
+from airports_ref import load_airports
+from fetch_metrics import FetchMetrics, count_retry
+from manifest import FetchManifest
+from parquet_sink import opensky_table, partition_path, write_table
+from utils import (
+    OAuthTokenCache,
+    TokenBucket,
+    build_airport_args,
+    build_date_args,
+    build_manifest_args,
+    build_output_args,
+    close_http_session,
+    http_session,
+    load_config,
+    resolve_dates,
+    resolve_output,
+    select_airports,
+)
 
 
+SOURCE = "opensky"
 OPENSKY_BASE = "https://opensky-network.org/api"
 OPENSKY_TOKEN_URL = (
     "https://auth.opensky-network.org/auth/realms/opensky-network/protocol/openid-connect/token"
 )
 
 
-@retry(stop=stop_after_attempt(5), wait=wait_exponential(multiplier=1, min=2, max=30))
-def _get_json(url: str, headers: dict, params: dict):
-    response = requests.get(url, headers=headers, params=params, timeout=30)
+class RateLimitedError(RuntimeError):
+    def __init__(self, retry_after: float | None):
+        super().__init__("Rate limited by OpenSky (429)")
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value) -> float | None:
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not math.isfinite(seconds) or seconds < 0:
+        return None
+    return seconds
+
+
+_backoff = wait_exponential(multiplier=1, min=2, max=30)
+
+
+def _wait_rate_limit(retry_state):
+    exc = retry_state.outcome.exception()
+    if isinstance(exc, RateLimitedError) and exc.retry_after:
+        return exc.retry_after
+    return _backoff(retry_state)
+
+
+@retry(
+    stop=stop_after_attempt(5),
+    wait=_wait_rate_limit,
+    retry=retry_if_exception_type((RateLimitedError, requests.RequestException)),
+    before_sleep=count_retry,
+)
+def _get_json(
+    url: str,
+    auth,
+    params: dict,
+    limiter: TokenBucket | None = None,
+    metrics: FetchMetrics | None = None,
+):
+    if limiter is not None:
+        limiter.acquire()
+    started = time.perf_counter()
+    try:
+        response = http_session().get(url, auth=auth, params=params, timeout=30)
+    except requests.RequestException:
+        if metrics is not None:
+            metrics.record_error()
+        raise
+    if metrics is not None:
+        metrics.record_response(
+            response.status_code, len(response.content), time.perf_counter() - started
+        )
+    if limiter is not None:
+        limiter.update_from_headers(response.headers)
     if response.status_code == 401:
+        if isinstance(auth, OAuthTokenCache) and not auth.just_issued():
+            auth.invalidate()
+            raise requests.HTTPError("OpenSky 401: token expire, renouvellement", response=response)
         raise RuntimeError(
             "OpenSky 401: identifiants invalides ou absents. "
             "Verifiez config.yaml (opensky.oauth ou opensky.username/password) "
@@ -30,50 +104,29 @@ def _get_json(url: str, headers: dict, params: dict):
     if response.status_code >= 500:
         response.raise_for_status()
     if response.status_code == 429:
-        retry_after = response.headers.get("X-Rate-Limit-Retry-After-Seconds")
-        if retry_after:
-            time.sleep(int(retry_after))
-        raise RuntimeError("Rate limited by OpenSky (429)")
+        retry_after = parse_retry_after(response.headers.get("X-Rate-Limit-Retry-After-Seconds"))
+        if limiter is not None and retry_after:
+            limiter.pause(retry_after)
+        raise RateLimitedError(retry_after)
     response.raise_for_status()
     return response.json()
 
 
-def build_auth_headers(config: dict) -> dict:
+def build_auth(config: dict):
     oauth_cfg = config.get("opensky", {}).get("oauth", {})
     client_id = oauth_cfg.get("client_id")
     client_secret = oauth_cfg.get("client_secret")
     if client_id and client_secret:
-        token = fetch_oauth_token(client_id, client_secret)
-        return {"Authorization": f"Bearer {token}"}
+        token_url = config["opensky"].get("token_url") or OPENSKY_TOKEN_URL
+        auth = OAuthTokenCache(token_url, client_id, client_secret)
+        auth.token()
+        return auth
 
     username = config["opensky"].get("username")
     password = config["opensky"].get("password")
     if not username or not password:
         raise ValueError("Identifiants OpenSky manquants dans config.yaml")
-    return {"Authorization": "Basic " + requests.auth._basic_auth_str(username, password)}
-
-
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
-def fetch_oauth_token(client_id: str, client_secret: str) -> str:
-    data = {
-        "grant_type": "client_credentials",
-        "client_id": client_id,
-        "client_secret": client_secret,
-    }
-    response = requests.post(OPENSKY_TOKEN_URL, data=data, timeout=30)
-    response.raise_for_status()
-    payload = response.json()
-    token = payload.get("access_token")
-    if not token:
-        raise RuntimeError("Token OAuth2 OpenSky manquant dans la reponse")
-    return token
-
-
-def read_airports(airports_file: str) -> pd.DataFrame:
-    df = pd.read_csv(airports_file)
-    if "icao" not in df.columns:
-        raise ValueError("airports_eu.csv doit contenir la colonne 'icao'")
-    return df.dropna(subset=["icao"]).drop_duplicates(subset=["icao"])
+    return requests.auth.HTTPBasicAuth(username, password)
 
 
 def epoch_range_for_date(day):
@@ -89,49 +142,175 @@ def write_jsonl(records, output_path: Path):
             f.write(json.dumps(row, ensure_ascii=True) + "\n")
 
 
-def fetch_for_airport(headers, airport: str, begin: int, end: int, flight_type: str):
+def write_records(records, output_path: Path):
+    if output_path.suffix == ".parquet":
+        write_table(opensky_table(records), output_path)
+    else:
+        write_jsonl(records, output_path)
+
+
+def unit_output_path(output_format: str, output_root: Path, day_str: str, airport: str, flight_type: str):
+    name = f"{airport}_{flight_type}"
+    if output_format == "parquet":
+        return partition_path(output_root, SOURCE, day_str, name)
+    return output_root / SOURCE / day_str / f"{name}.jsonl"
+
+
+def fetch_for_airport(
+    auth,
+    airport: str,
+    begin: int,
+    end: int,
+    flight_type: str,
+    limiter: TokenBucket | None = None,
+    base_url: str = OPENSKY_BASE,
+    metrics: FetchMetrics | None = None,
+):
     if flight_type == "departure":
-        endpoint = f"{OPENSKY_BASE}/flights/departure"
+        endpoint = f"{base_url}/flights/departure"
     elif flight_type == "arrival":
-        endpoint = f"{OPENSKY_BASE}/flights/arrival"
+        endpoint = f"{base_url}/flights/arrival"
     else:
         raise ValueError("flight_type invalide: {}".format(flight_type))
 
     params = {"airport": airport, "begin": begin, "end": end}
-    return _get_json(endpoint, headers=headers, params=params)
+    return _get_json(endpoint, auth=auth, params=params, limiter=limiter, metrics=metrics)
+
+
+def fetch_unit(
+    auth,
+    limiter: TokenBucket,
+    manifest: FetchManifest,
+    airport: str,
+    day_date,
+    flight_type: str,
+    output_path: Path,
+    base_url: str = OPENSKY_BASE,
+    metrics: FetchMetrics | None = None,
+):
+    day_str = day_date.strftime("%Y-%m-%d")
+    try:
+        begin, end_ts = epoch_range_for_date(day_date)
+        records = fetch_for_airport(
+            auth,
+            airport,
+            begin,
+            end_ts,
+            flight_type,
+            limiter=limiter,
+            base_url=base_url,
+            metrics=metrics,
+        )
+        for record in records:
+            record["flight_type"] = flight_type
+            record["airport_icao"] = airport
+        write_records(records, output_path)
+    except Exception as exc:
+        manifest.mark_failed(SOURCE, airport, day_str, flight_type, repr(exc))
+        if metrics is not None:
+            metrics.record_units("failed")
+        print("Echec {} {} {}: {}".format(day_str, airport, flight_type, exc))
+        return None
+
+    manifest.mark_done(SOURCE, airport, day_str, flight_type, len(records), output_path)
+    if metrics is not None:
+        metrics.record_units("done")
+    return len(records)
+
+
+def run_units(
+    units,
+    auth,
+    limiter: TokenBucket,
+    manifest: FetchManifest,
+    workers: int,
+    base_url: str = OPENSKY_BASE,
+    metrics: FetchMetrics | None = None,
+):
+    total = 0
+    failed = 0
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = [
+            executor.submit(
+                fetch_unit, auth, limiter, manifest, *unit, base_url=base_url, metrics=metrics
+            )
+            for unit in units
+        ]
+        for future in as_completed(futures):
+            count = future.result()
+            if count is None:
+                failed += 1
+            else:
+                total += count
+    except BaseException:
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown(wait=True)
+    return total, failed
 
 
 def main():
     parser = argparse.ArgumentParser(description="Fetch OpenSky flights by airport")
     build_date_args(parser)
     parser.add_argument("--config", default="config.yaml")
-    parser.add_argument("--sleep", type=float, default=1.0, help="Delay between calls")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent requests")
+    parser.add_argument("--rate", type=float, default=1.0, help="Max requests per second (all workers)")
+    parser.add_argument("--burst", type=int, default=None, help="Token bucket size (default: workers)")
+    build_manifest_args(parser)
+    build_output_args(parser)
+    build_airport_args(parser)
     args = parser.parse_args()
 
     config = load_config(args.config)
     airports_file = config["airports"]["file"]
-    raw_dir = Path(config["storage"]["raw_dir"]) / "opensky"
-    headers = build_auth_headers(config)
+    output_format, output_root = resolve_output(args, config)
+    manifest = FetchManifest(config["storage"]["raw_dir"])
+    only_missing = args.only_missing or args.refresh_older_than is not None
+    http_session(config, min_pool_size=args.workers)
+    auth = build_auth(config)
+    base_url = config["opensky"].get("base_url") or OPENSKY_BASE
 
-    airports_df = read_airports(airports_file)
+    airports = select_airports(load_airports(airports_file), args)
     start, end = resolve_dates(args, config)
+    limiter = TokenBucket(rate=args.rate, capacity=args.burst or args.workers)
 
+    codes = airports.codes
+    units = []
+    skipped = 0
     for day in pd.date_range(start, end, freq="D"):
         day_date = day.date()
-        begin, end_ts = epoch_range_for_date(day_date)
-        day_dir = ensure_dir(raw_dir / day_date.strftime("%Y-%m-%d"))
-
-        for _, row in airports_df.iterrows():
-            airport = row["icao"]
+        day_str = day_date.strftime("%Y-%m-%d")
+        for airport in codes:
             for flight_type in ("departure", "arrival"):
-                records = fetch_for_airport(headers, airport, begin, end_ts, flight_type)
-                for record in records:
-                    record["flight_type"] = flight_type
-                    record["airport_icao"] = airport
-
-                output_path = Path(day_dir) / f"{airport}_{flight_type}.jsonl"
-                write_jsonl(records, output_path)
-                time.sleep(args.sleep)
+                output_path = unit_output_path(output_format, output_root, day_str, airport, flight_type)
+                if only_missing and not manifest.needs_fetch(
+                    SOURCE, airport, day_str, flight_type, args.refresh_older_than, output_path
+                ):
+                    skipped += 1
+                    continue
+                units.append((airport, day_date, flight_type, output_path))
+
+    metrics = FetchMetrics(SOURCE)
+    metrics.record_units("skipped", skipped)
+    try:
+        total, failed = run_units(
+            units, auth, limiter, manifest, args.workers, base_url, metrics
+        )
+    finally:
+        manifest.close()
+        close_http_session()
+        metrics_path = metrics.write(config["storage"]["raw_dir"])
+        print("Metriques: {}".format(metrics_path))
+    if isinstance(auth, OAuthTokenCache):
+        print("Token OAuth2: {} emission(s)".format(auth.refreshes))
+    print(
+        "OpenSky: {} requetes, {} vols, {} deja a jour, {} en echec".format(
+            len(units), total, skipped, failed
+        )
+    )
+    if failed:
+        raise SystemExit("{} unites en echec: relancer avec --only-missing".format(failed))
 
 
 if __name__ == "__main__":
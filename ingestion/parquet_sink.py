@@ -0,0 +1,79 @@
+import os
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+
+OPENSKY_SCHEMA = pa.schema(
+    [
+        ("icao24", pa.string()),
+        ("callsign", pa.string()),
+        ("estDepartureAirport", pa.string()),
+        ("estArrivalAirport", pa.string()),
+        ("firstSeen", pa.int64()),
+        ("lastSeen", pa.int64()),
+        ("estDepartureAirportHorizDistance", pa.int64()),
+        ("estDepartureAirportVertDistance", pa.int64()),
+        ("estArrivalAirportHorizDistance", pa.int64()),
+        ("estArrivalAirportVertDistance", pa.int64()),
+        ("departureAirportCandidatesCount", pa.int64()),
+        ("arrivalAirportCandidatesCount", pa.int64()),
+        ("flight_type", pa.string()),
+        ("airport_icao", pa.string()),
+    ]
+)
+
+WEATHER_SCHEMA = pa.schema(
+    [
+        ("airport_icao", pa.string()),
+        ("timezone", pa.string()),
+        ("time_local", pa.string()),
+        ("time_utc", pa.timestamp("s")),
+        ("temperature_2m", pa.float64()),
+        ("precipitation", pa.float64()),
+        ("wind_speed_10m", pa.float64()),
+        ("cloud_cover", pa.float64()),
+    ]
+)
+
+WEATHER_VALUE_COLUMNS = ["temperature_2m", "precipitation", "wind_speed_10m", "cloud_cover"]
+
+
+def partition_path(root, source: str, day: str, name: str) -> Path:
+    return Path(root) / source / f"day={day}" / f"{name}.parquet"
+
+
+def opensky_table(records) -> pa.Table:
+    columns = {field.name: [record.get(field.name) for record in records] for field in OPENSKY_SCHEMA}
+    return pa.Table.from_pydict(columns, schema=OPENSKY_SCHEMA)
+
+
+def weather_table(payload: dict) -> pa.Table:
+    hourly = payload.get("hourly") or {}
+    times = pa.array(hourly.get("time") or [], type=pa.string())
+    size = len(times)
+    columns = {
+        "airport_icao": pa.array([payload.get("airport_icao")] * size, type=pa.string()),
+        "timezone": pa.array([payload.get("timezone") or "UTC"] * size, type=pa.string()),
+        "time_local": times,
+        "time_utc": pc.subtract(
+            pc.strptime(times, format="%Y-%m-%dT%H:%M", unit="s"),
+            pa.scalar(payload.get("utc_offset_seconds") or 0, type=pa.duration("s")),
+        ),
+    }
+    for name in WEATHER_VALUE_COLUMNS:
+        values = hourly.get(name)
+        if values is None:
+            values = [None] * size
+        columns[name] = pa.array(values, type=pa.float64())
+    return pa.Table.from_pydict(columns, schema=WEATHER_SCHEMA)
+
+
+def write_table(table: pa.Table, output_path: Path):
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, output_path)
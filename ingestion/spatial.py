@@ -0,0 +1,117 @@
+from typing import NamedTuple
+
+import numpy as np
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+class Cell(NamedTuple):
+    latitude: float
+    longitude: float
+    members: list
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = (
+        np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2)
+    )
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class GridIndex:
+    def __init__(self, latitudes, longitudes, cell_deg: float):
+        if cell_deg <= 0:
+            raise ValueError("cell_deg doit etre > 0")
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        self.cell_deg = cell_deg
+        rows = np.rint(self.latitudes / cell_deg).astype(np.int64)
+        cols = np.rint(self.longitudes / cell_deg).astype(np.int64)
+        self.buckets = {}
+        for position, key in enumerate(zip(rows.tolist(), cols.tolist())):
+            self.buckets.setdefault(key, []).append(position)
+        if self.buckets:
+            keys = np.array(list(self.buckets), dtype=np.int64)
+            self._min_key = keys.min(axis=0)
+            self._max_key = keys.max(axis=0)
+
+    def __len__(self) -> int:
+        return len(self.latitudes)
+
+    def cells(self):
+        out = []
+        for _, members in sorted(self.buckets.items()):
+            latitude = float(self.latitudes[members].mean())
+            longitude = float(self.longitudes[members].mean())
+            out.append(Cell(round(latitude, 6), round(longitude, 6), members))
+        return out
+
+    def _ring(self, row: int, col: int, radius: int):
+        if radius == 0:
+            yield row, col
+            return
+        for c in range(col - radius, col + radius + 1):
+            yield row - radius, c
+            yield row + radius, c
+        for r in range(row - radius + 1, row + radius):
+            yield r, col - radius
+            yield r, col + radius
+
+    def _ring_min_km(self, latitude: float, radius: int) -> float:
+        if radius <= 1:
+            return 0.0
+        reach = (radius - 1) * self.cell_deg
+        far_lat = min(90.0, abs(latitude) + (radius + 1) * self.cell_deg)
+        return float(haversine_km(far_lat, 0.0, far_lat, reach))
+
+    def nearest(self, latitude: float, longitude: float, k: int = 1, max_km: float | None = None):
+        if not self.buckets:
+            return []
+        row = int(round(latitude / self.cell_deg))
+        col = int(round(longitude / self.cell_deg))
+        max_radius = int(
+            max(
+                abs(row - self._min_key[0]),
+                abs(row - self._max_key[0]),
+                abs(col - self._min_key[1]),
+                abs(col - self._max_key[1]),
+            )
+        )
+        found = []
+        for radius in range(max_radius + 1):
+            bound = self._ring_min_km(latitude, radius)
+            if max_km is not None and bound > max_km:
+                break
+            if len(found) >= k and found[k - 1][1] <= bound:
+                break
+            candidates = [
+                position
+                for key in self._ring(row, col, radius)
+                for position in self.buckets.get(key, ())
+            ]
+            if not candidates:
+                continue
+            distances = haversine_km(
+                latitude, longitude, self.latitudes[candidates], self.longitudes[candidates]
+            )
+            found.extend(zip(candidates, distances.tolist()))
+            found.sort(key=lambda item: item[1])
+        if max_km is not None:
+            found = [item for item in found if item[1] <= max_km]
+        return found[:k]
+
+
+def point_cells(latitudes, longitudes):
+    pairs = zip(np.asarray(latitudes).tolist(), np.asarray(longitudes).tolist())
+    return [Cell(lat, lon, [position]) for position, (lat, lon) in enumerate(pairs)]
+
+
+def weather_cells(latitudes, longitudes, cell_deg: float):
+    if not cell_deg or cell_deg <= 0:
+        return point_cells(latitudes, longitudes)
+    return GridIndex(latitudes, longitudes, cell_deg).cells()
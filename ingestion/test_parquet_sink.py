@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from parquet_sink import WEATHER_SCHEMA, weather_table
+
+
+def test_weather_table_keeps_local_time():
+    payload = {
+        "airport_icao": "LFPG",
+        "timezone": "Europe/Paris",
+        "utc_offset_seconds": 3600,
+        "hourly": {"time": ["2026-02-01T00:00", "2026-02-01T01:00"], "temperature_2m": [1.0, 2.0]},
+    }
+    table = weather_table(payload)
+    assert table.schema == WEATHER_SCHEMA
+    assert table.column("time_local").to_pylist() == ["2026-02-01T00:00", "2026-02-01T01:00"]
+    assert table.column("time_utc").to_pylist() == [datetime(2026, 1, 31, 23), datetime(2026, 2, 1)]
+    assert table.column("precipitation").to_pylist() == [None, None]
+
+
+def test_weather_table_defaults_to_utc():
+    table = weather_table({"airport_icao": "EGLL", "hourly": {"time": ["2026-02-01T00:00"]}})
+    assert table.column("timezone").to_pylist() == ["UTC"]
+    assert table.column("time_utc").to_pylist() == [datetime(2026, 2, 1)]
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from spatial import GridIndex, haversine_km, point_cells, weather_cells
+
+
+def brute_force(lats, lons, latitude, longitude, k, max_km=None):
+    distances = haversine_km(latitude, longitude, lats, lons)
+    order = np.argsort(distances, kind="stable")
+    found = [(int(i), float(distances[i])) for i in order]
+    if max_km is not None:
+        found = [item for item in found if item[1] <= max_km]
+    return found[:k]
+
+
+def test_haversine_paris_london():
+    assert haversine_km(49.0097, 2.5479, 51.4700, -0.4543) == pytest.approx(348, abs=2)
+
+
+def test_grid_requires_positive_cell():
+    with pytest.raises(ValueError):
+        GridIndex([48.0], [2.0], 0)
+
+
+def test_nearest_empty_index():
+    assert GridIndex([], [], 1.0).nearest(48.0, 2.0, k=3) == []
+
+
+@pytest.mark.parametrize("cell_deg", [0.1, 0.5, 1.0, 3.0])
+def test_nearest_matches_brute_force(cell_deg):
+    rng = np.random.default_rng(7)
+    lats = rng.uniform(35, 71, 400)
+    lons = rng.uniform(-25, 45, 400)
+    index = GridIndex(lats, lons, cell_deg)
+    queries = list(zip(rng.uniform(30, 75, 40), rng.uniform(-30, 50, 40)))
+    queries += [(80.0, 0.0), (0.0, 0.0), (lats[0], lons[0])]
+    for latitude, longitude in queries:
+        for k in (1, 5, 20):
+            got = index.nearest(latitude, longitude, k=k)
+            expected = brute_force(lats, lons, latitude, longitude, k)
+            assert [d for _, d in got] == pytest.approx([d for _, d in expected])
+
+
+def test_nearest_max_km():
+    rng = np.random.default_rng(11)
+    lats = rng.uniform(40, 60, 200)
+    lons = rng.uniform(-10, 30, 200)
+    index = GridIndex(lats, lons, 1.0)
+    for latitude, longitude in zip(rng.uniform(40, 60, 20), rng.uniform(-10, 30, 20)):
+        got = index.nearest(latitude, longitude, k=10, max_km=150)
+        expected = brute_force(lats, lons, latitude, longitude, 10, max_km=150)
+        assert [d for _, d in got] == pytest.approx([d for _, d in expected])
+        assert all(distance <= 150 for _, distance in got)
+
+
+def test_cells_keep_single_airport_coordinates():
+    lats = [48.7233, 49.0097, 49.0120]
+    lons = [2.3794, 2.5479, 2.5401]
+    cells = GridIndex(lats, lons, 0.1).cells()
+    assert sorted(sorted(cell.members) for cell in cells) == [[0], [1, 2]]
+    single = next(cell for cell in cells if cell.members == [0])
+    assert (single.latitude, single.longitude) == (48.7233, 2.3794)
+    shared = next(cell for cell in cells if len(cell.members) == 2)
+    assert shared.latitude == pytest.approx((49.0097 + 49.0120) / 2)
+    assert shared.longitude == pytest.approx((2.5479 + 2.5401) / 2)
+
+
+def test_weather_cells_without_grid():
+    cells = weather_cells([48.7, 49.0], [2.3, 2.5], 0)
+    assert cells == point_cells([48.7, 49.0], [2.3, 2.5])
+    assert [cell.members for cell in cells] == [[0], [1]]
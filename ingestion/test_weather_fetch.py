@@ -0,0 +1,26 @@
+from weather_fetch import split_payload_by_day
+
+
+def test_split_payload_by_day():
+    payload = {
+        "latitude": 49.0,
+        "longitude": 2.5,
+        "hourly": {
+            "time": ["2026-02-01T22:00", "2026-02-01T23:00", "2026-02-02T00:00"],
+            "temperature_2m": [1.0, 2.0, 3.0],
+        },
+    }
+    out = split_payload_by_day(payload)
+    assert list(out) == ["2026-02-01", "2026-02-02"]
+    assert out["2026-02-01"]["hourly"] == {
+        "time": ["2026-02-01T22:00", "2026-02-01T23:00"],
+        "temperature_2m": [1.0, 2.0],
+    }
+    assert out["2026-02-02"]["hourly"]["temperature_2m"] == [3.0]
+    assert out["2026-02-02"]["latitude"] == 49.0
+    assert payload["hourly"]["temperature_2m"] == [1.0, 2.0, 3.0]
+
+
+def test_split_payload_without_hours():
+    assert split_payload_by_day({"hourly": {"time": []}}) == {}
+    assert split_payload_by_day({}) == {}
@@ -1,9 +1,20 @@
 import argparse
 import datetime as dt
 import os
+import threading
+import time
 from pathlib import Path
 
+import requests
 import yaml
+from requests.adapters import HTTPAdapter
+from tenacity import retry, stop_after_attempt, wait_exponential
+
+
+DEFAULT_HTTP_POOL_SIZE = 10
+TOKEN_REFRESH_MARGIN_S = 60
+TOKEN_DEFAULT_TTL_S = 300
+TOKEN_FRESH_WINDOW_S = 10
 
 
 def load_config(config_path: str = "config.yaml") -> dict:
@@ -52,3 +63,192 @@ def resolve_dates(args, config: dict):
     start = parse_date(run_cfg.get("start_date"))
     end = parse_date(run_cfg.get("end_date"))
     return start, end
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int = 1):
+        if rate <= 0:
+            raise ValueError("rate doit etre > 0")
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        if now <= self._updated:
+            return
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    self._refill(now)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        if seconds <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = self._paused_until
+
+    def update_from_headers(self, headers, remaining_header: str = "X-Rate-Limit-Remaining"):
+        remaining = headers.get(remaining_header)
+        if remaining is None:
+            return
+        try:
+            remaining = int(remaining)
+        except ValueError:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, float(remaining))
+
+
+def build_manifest_args(parser: argparse.ArgumentParser):
+    group = parser.add_argument_group("manifest")
+    group.add_argument(
+        "--only-missing",
+        action="store_true",
+        help="Skip units already fetched successfully (see _manifest.sqlite)",
+    )
+    group.add_argument(
+        "--refresh-older-than",
+        type=float,
+        default=None,
+        metavar="DAYS",
+        help="Refetch completed units older than DAYS (implies --only-missing)",
+    )
+
+
+def build_output_args(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--format",
+        choices=["json", "parquet"],
+        default=None,
+        help="Raw output format (default: storage.format, else json)",
+    )
+
+
+def resolve_output(args, config: dict):
+    storage = config["storage"]
+    output_format = args.format or storage.get("format", "json")
+    if output_format == "parquet":
+        return output_format, Path(storage.get("parquet_dir", "data/parquet"))
+    return output_format, Path(storage["raw_dir"])
+
+
+def build_airport_args(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--airports",
+        default=None,
+        help="Comma-separated ICAO subset of the airports file (default: all)",
+    )
+
+
+def select_airports(airports, args):
+    if not args.airports:
+        return airports
+    return airports.subset(args.airports.split(","))
+
+
+def build_session(pool_size: int = DEFAULT_HTTP_POOL_SIZE) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+    return session
+
+
+_http_session = None
+_http_lock = threading.Lock()
+
+
+def http_session(config: dict | None = None, min_pool_size: int = 0) -> requests.Session:
+    global _http_session
+    with _http_lock:
+        if _http_session is None:
+            http_cfg = (config or {}).get("http") or {}
+            pool_size = int(http_cfg.get("pool_size", DEFAULT_HTTP_POOL_SIZE))
+            _http_session = build_session(max(pool_size, min_pool_size))
+        return _http_session
+
+
+def close_http_session():
+    global _http_session
+    with _http_lock:
+        if _http_session is not None:
+            _http_session.close()
+            _http_session = None
+
+
+class OAuthTokenCache(requests.auth.AuthBase):
+    def __init__(
+        self,
+        token_url: str,
+        client_id: str,
+        client_secret: str,
+        refresh_margin: float = TOKEN_REFRESH_MARGIN_S,
+    ):
+        self.token_url = token_url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.refresh_margin = refresh_margin
+        self._token = None
+        self._expires_at = 0.0
+        self._issued_at = None
+        self._lock = threading.Lock()
+        self.refreshes = 0
+
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+    def _fetch(self):
+        data = {
+            "grant_type": "client_credentials",
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+        }
+        response = http_session().post(self.token_url, data=data, timeout=30)
+        response.raise_for_status()
+        payload = response.json()
+        token = payload.get("access_token")
+        if not token:
+            raise RuntimeError("Token OAuth2 manquant dans la reponse de {}".format(self.token_url))
+        return token, float(payload.get("expires_in") or TOKEN_DEFAULT_TTL_S)
+
+    def token(self) -> str:
+        with self._lock:
+            if self._token is None or time.monotonic() >= self._expires_at - self.refresh_margin:
+                requested_at = time.monotonic()
+                self._token, ttl = self._fetch()
+                self._expires_at = requested_at + ttl
+                self._issued_at = requested_at
+                self.refreshes += 1
+            return self._token
+
+    def just_issued(self, window: float = TOKEN_FRESH_WINDOW_S) -> bool:
+        with self._lock:
+            return self._issued_at is not None and time.monotonic() - self._issued_at < window
+
+    def invalidate(self):
+        with self._lock:
+            self._expires_at = 0.0
+
+    def __call__(self, request):
+        request.headers["Authorization"] = f"Bearer {self.token()}"
+        return request
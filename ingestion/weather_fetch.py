@@ -3,14 +3,33 @@ import json
 import time
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import requests
 from tenacity import retry, stop_after_attempt, wait_exponential
 
-from utils import build_date_args, ensure_dir, load_config, resolve_dates
+from airports_ref import AirportIndex, load_airports
+from fetch_metrics import FetchMetrics, count_retry
+from manifest import FetchManifest
+from parquet_sink import partition_path, weather_table, write_table
+from spatial import weather_cells
+from utils import (
+    build_airport_args,
+    build_date_args,
+    build_manifest_args,
+    build_output_args,
+    close_http_session,
+    http_session,
+    load_config,
+    resolve_dates,
+    resolve_output,
+    select_airports,
+)
 
 
+SOURCE = "weather"
 OPEN_METEO_ARCHIVE = "https://archive-api.open-meteo.com/v1/archive"
+DEFAULT_GRID_DEG = 0.1
 HOURLY_VARS = [
     "temperature_2m",
     "precipitation",
@@ -19,9 +38,23 @@ HOURLY_VARS = [
 ]
 
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
-def _get_json(params: dict):
-    response = requests.get(OPEN_METEO_ARCHIVE, params=params, timeout=30)
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=2, max=10),
+    before_sleep=count_retry,
+)
+def _get_json(params: dict, url: str = OPEN_METEO_ARCHIVE, metrics: FetchMetrics | None = None):
+    started = time.perf_counter()
+    try:
+        response = http_session().get(url, params=params, timeout=30)
+    except requests.RequestException:
+        if metrics is not None:
+            metrics.record_error()
+        raise
+    if metrics is not None:
+        metrics.record_response(
+            response.status_code, len(response.content), time.perf_counter() - started
+        )
     if response.status_code >= 500:
         response.raise_for_status()
     if response.status_code == 429:
@@ -30,56 +63,322 @@ def _get_json(params: dict):
     return response.json()
 
 
-def read_airports(airports_file: str) -> pd.DataFrame:
-    df = pd.read_csv(airports_file)
-    required = {"icao", "latitude", "longitude"}
-    missing = required.difference(df.columns)
-    if missing:
-        raise ValueError("Colonnes manquantes dans airports_eu.csv: {}".format(sorted(missing)))
-    return df.dropna(subset=["icao", "latitude", "longitude"]).drop_duplicates(subset=["icao"])
-
-
 def write_json(payload, output_path: Path):
     output_path.parent.mkdir(parents=True, exist_ok=True)
     with output_path.open("w", encoding="utf-8") as f:
         json.dump(payload, f, ensure_ascii=True)
 
 
+def chunked(items, size: int):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def split_payload_by_day(payload: dict) -> dict:
+    hourly = payload.get("hourly") or {}
+    times = hourly.get("time") or []
+    bounds = {}
+    for idx, ts in enumerate(times):
+        day = ts[:10]
+        first, _ = bounds.get(day, (idx, idx))
+        bounds[day] = (first, idx + 1)
+
+    out = {}
+    for day, (first, last) in bounds.items():
+        day_payload = {k: v for k, v in payload.items() if k != "hourly"}
+        day_payload["hourly"] = {key: values[first:last] for key, values in hourly.items()}
+        out[day] = day_payload
+    return out
+
+
+def fetch_batch(
+    cells,
+    start_date: str,
+    end_date: str,
+    timezone: str,
+    url: str = OPEN_METEO_ARCHIVE,
+    metrics: FetchMetrics | None = None,
+):
+    params = {
+        "latitude": ",".join(str(cell.latitude) for cell in cells),
+        "longitude": ",".join(str(cell.longitude) for cell in cells),
+        "start_date": start_date,
+        "end_date": end_date,
+        "hourly": ",".join(HOURLY_VARS),
+        "timezone": timezone,
+    }
+    payload = _get_json(params, url, metrics=metrics)
+    if isinstance(payload, dict):
+        payload = [payload]
+    if len(payload) != len(cells):
+        raise RuntimeError(
+            "Open-Meteo: {} reponses pour {} points".format(len(payload), len(cells))
+        )
+    return payload
+
+
+def unit_output_path(output_format: str, output_root: Path, day_date: str, airport: str) -> Path:
+    if output_format == "parquet":
+        return partition_path(output_root, SOURCE, day_date, airport)
+    return Path(output_root) / SOURCE / day_date / f"{airport}.json"
+
+
+def write_day_payload(
+    manifest: FetchManifest,
+    output_format: str,
+    output_root: Path,
+    airport: str,
+    day_date: str,
+    payload: dict,
+):
+    payload["airport_icao"] = airport
+    output_path = unit_output_path(output_format, output_root, day_date, airport)
+    if output_format == "parquet":
+        write_table(weather_table(payload), output_path)
+    else:
+        write_json(payload, output_path)
+    row_count = len((payload.get("hourly") or {}).get("time") or [])
+    manifest.mark_done(SOURCE, airport, day_date, "", row_count, output_path)
+
+
+def write_cell_payload(
+    manifest: FetchManifest,
+    output_format: str,
+    output_root: Path,
+    codes,
+    day_date: str,
+    payload: dict,
+):
+    for airport in codes:
+        write_day_payload(manifest, output_format, output_root, airport, day_date, dict(payload))
+
+
+def run_single(
+    airports: AirportIndex,
+    output_format: str,
+    output_root: Path,
+    start,
+    end,
+    timezone: str,
+    sleep: float,
+    manifest: FetchManifest,
+    only_missing: bool,
+    refresh_older_than: float | None,
+    archive_url: str = OPEN_METEO_ARCHIVE,
+    metrics: FetchMetrics | None = None,
+    grid_deg: float = DEFAULT_GRID_DEG,
+):
+    failed = 0
+    codes = airports.codes
+    cells = weather_cells(airports.latitude, airports.longitude, grid_deg)
+    for day in pd.date_range(start, end, freq="D"):
+        day_date = day.date().strftime("%Y-%m-%d")
+
+        for cell in cells:
+            cell_codes = [codes[position] for position in cell.members]
+            if only_missing:
+                cell_codes = [
+                    airport
+                    for airport in cell_codes
+                    if manifest.needs_fetch(
+                        SOURCE,
+                        airport,
+                        day_date,
+                        "",
+                        refresh_older_than,
+                        unit_output_path(output_format, output_root, day_date, airport),
+                    )
+                ]
+                if metrics is not None:
+                    metrics.record_units("skipped", len(cell.members) - len(cell_codes))
+                if not cell_codes:
+                    continue
+            params = {
+                "latitude": cell.latitude,
+                "longitude": cell.longitude,
+                "start_date": day_date,
+                "end_date": day_date,
+                "hourly": ",".join(HOURLY_VARS),
+                "timezone": timezone,
+            }
+            try:
+                payload = _get_json(params, archive_url, metrics=metrics)
+                write_cell_payload(manifest, output_format, output_root, cell_codes, day_date, payload)
+                if metrics is not None:
+                    metrics.record_units("done", len(cell_codes))
+            except Exception as exc:
+                for airport in cell_codes:
+                    manifest.mark_failed(SOURCE, airport, day_date, "", repr(exc))
+                if metrics is not None:
+                    metrics.record_units("failed", len(cell_codes))
+                print("Echec {} {}: {}".format(day_date, ",".join(cell_codes), exc))
+                failed += len(cell_codes)
+            time.sleep(sleep)
+    return failed
+
+
+def run_batched(
+    airports: AirportIndex,
+    output_format: str,
+    output_root: Path,
+    start,
+    end,
+    timezone: str,
+    sleep: float,
+    batch_size: int,
+    batch_days: int,
+    manifest: FetchManifest,
+    only_missing: bool,
+    refresh_older_than: float | None,
+    archive_url: str = OPEN_METEO_ARCHIVE,
+    metrics: FetchMetrics | None = None,
+    grid_deg: float = DEFAULT_GRID_DEG,
+):
+    failed = 0
+    days = [d.strftime("%Y-%m-%d") for d in pd.date_range(start, end, freq="D")]
+    codes = airports.codes
+    for span in chunked(days, batch_days):
+        span_rows = airports
+        if only_missing:
+            missing = [
+                any(
+                    manifest.needs_fetch(
+                        SOURCE,
+                        airport,
+                        day,
+                        "",
+                        refresh_older_than,
+                        unit_output_path(output_format, output_root, day, airport),
+                    )
+                    for day in span
+                )
+                for airport in codes
+            ]
+            span_rows = airports[np.array(missing, dtype=bool)]
+            if metrics is not None:
+                metrics.record_units("skipped", (len(airports) - len(span_rows)) * len(span))
+        span_codes = span_rows.codes
+        cells = weather_cells(span_rows.latitude, span_rows.longitude, grid_deg)
+        for batch in chunked(cells, batch_size):
+            batch_codes = [[span_codes[position] for position in cell.members] for cell in batch]
+            airport_count = sum(len(cell_codes) for cell_codes in batch_codes)
+            try:
+                payloads = fetch_batch(batch, span[0], span[-1], timezone, archive_url, metrics)
+            except Exception as exc:
+                for cell_codes in batch_codes:
+                    for airport in cell_codes:
+                        for day in span:
+                            manifest.mark_failed(SOURCE, airport, day, "", repr(exc))
+                print(
+                    "Echec {}..{} ({} points, {} aeroports): {}".format(
+                        span[0], span[-1], len(batch), airport_count, exc
+                    )
+                )
+                failed += airport_count * len(span)
+                if metrics is not None:
+                    metrics.record_units("failed", airport_count * len(span))
+                continue
+            for cell_codes, payload in zip(batch_codes, payloads):
+                for day_date, day_payload in split_payload_by_day(payload).items():
+                    write_cell_payload(
+                        manifest, output_format, output_root, cell_codes, day_date, day_payload
+                    )
+                    if metrics is not None:
+                        metrics.record_units("done", len(cell_codes))
+            time.sleep(sleep)
+    return failed
+
+
 def main():
     parser = argparse.ArgumentParser(description="Fetch Open-Meteo archive by airport")
     build_date_args(parser)
     parser.add_argument("--config", default="config.yaml")
     parser.add_argument("--sleep", type=float, default=1.0, help="Delay between calls")
+    parser.add_argument(
+        "--batched",
+        action="store_true",
+        help="Group several airports and a date span into one request",
+    )
+    parser.add_argument("--batch-size", type=int, default=50, help="Grid points per batched request")
+    parser.add_argument(
+        "--grid-deg",
+        type=float,
+        default=None,
+        help="Grid cell size in degrees, one request per cell (default: weather.grid_deg, 0: per airport)",
+    )
+    parser.add_argument("--batch-days", type=int, default=31, help="Days per batched request")
+    build_manifest_args(parser)
+    build_output_args(parser)
+    build_airport_args(parser)
     args = parser.parse_args()
 
     config = load_config(args.config)
     airports_file = config["airports"]["file"]
-    raw_dir = Path(config["storage"]["raw_dir"]) / "weather"
+    output_format, output_root = resolve_output(args, config)
+    manifest = FetchManifest(config["storage"]["raw_dir"])
+    only_missing = args.only_missing or args.refresh_older_than is not None
     timezone_default = "UTC"
+    weather_cfg = config.get("weather") or {}
+    archive_url = weather_cfg.get("archive_url") or OPEN_METEO_ARCHIVE
+    grid_deg = args.grid_deg
+    if grid_deg is None:
+        grid_deg = float(weather_cfg.get("grid_deg", DEFAULT_GRID_DEG))
 
-    airports_df = read_airports(airports_file)
+    airports = select_airports(
+        load_airports(airports_file, required=("icao", "latitude", "longitude")), args
+    )
     start, end = resolve_dates(args, config)
+    metrics = FetchMetrics(SOURCE)
+    http_session(config)
+    cell_count = len(weather_cells(airports.latitude, airports.longitude, grid_deg))
+    print(
+        "Meteo: {} aeroports -> {} points de grille ({} deg)".format(
+            len(airports), cell_count, grid_deg
+        )
+    )
 
-    for day in pd.date_range(start, end, freq="D"):
-        day_date = day.date().strftime("%Y-%m-%d")
-        day_dir = ensure_dir(raw_dir / day_date)
-
-        for _, row in airports_df.iterrows():
-            airport = row["icao"]
-            params = {
-                "latitude": row["latitude"],
-                "longitude": row["longitude"],
-                "start_date": day_date,
-                "end_date": day_date,
-                "hourly": ",".join(HOURLY_VARS),
-                "timezone": timezone_default,
-            }
-            payload = _get_json(params)
-            payload["airport_icao"] = airport
-
-            output_path = Path(day_dir) / f"{airport}.json"
-            write_json(payload, output_path)
-            time.sleep(args.sleep)
+    try:
+        if args.batched:
+            failed = run_batched(
+                airports,
+                output_format,
+                output_root,
+                start,
+                end,
+                timezone_default,
+                args.sleep,
+                args.batch_size,
+                args.batch_days,
+                manifest,
+                only_missing,
+                args.refresh_older_than,
+                archive_url,
+                metrics,
+                grid_deg,
+            )
+        else:
+            failed = run_single(
+                airports,
+                output_format,
+                output_root,
+                start,
+                end,
+                timezone_default,
+                args.sleep,
+                manifest,
+                only_missing,
+                args.refresh_older_than,
+                archive_url,
+                metrics,
+                grid_deg,
+            )
+    finally:
+        manifest.close()
+        close_http_session()
+        metrics_path = metrics.write(config["storage"]["raw_dir"])
+        print("Metriques: {}".format(metrics_path))
+    if failed:
+        raise SystemExit("{} unites en echec: relancer avec --only-missing".format(failed))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,142 @@
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+
+from train import build_pipeline, evaluate
+
+
+LOWER_IS_BETTER = {"mae", "rmse"}
+
+
+def rolling_origin_folds(
+    times: pd.Series, n_folds: int, fold_days: int, max_train_days: int | None = None
+):
+    times = pd.to_datetime(times, utc=True)
+    end = times.max()
+    folds = []
+    for k in range(n_folds, 0, -1):
+        test_start = end - pd.Timedelta(days=fold_days * k)
+        test_end = test_start + pd.Timedelta(days=fold_days)
+        train_mask = times <= test_start
+        if max_train_days:
+            train_mask &= times > test_start - pd.Timedelta(days=max_train_days)
+        test_mask = (times > test_start) & (times <= test_end)
+        if train_mask.any() and test_mask.any():
+            folds.append(
+                {
+                    "train_idx": np.flatnonzero(train_mask.to_numpy()),
+                    "test_idx": np.flatnonzero(test_mask.to_numpy()),
+                    "test_start": test_start.isoformat(),
+                    "test_end": test_end.isoformat(),
+                }
+            )
+    if not folds:
+        raise ValueError(
+            f"Aucun pli exploitable: historique trop court pour {n_folds} plis de {fold_days} jours"
+        )
+    return folds
+
+
+def prefixed(step: str, params: dict) -> dict:
+    return {f"{step}__{name}": value for name, value in params.items()}
+
+
+def build_candidate(target_type: str, numeric, categorical, candidate: dict):
+    pipeline = build_pipeline(target_type, numeric, categorical, candidate["family"])
+    pipeline.set_params(
+        **prefixed("preprocess", candidate["encoder"]), **prefixed("model", candidate["model"])
+    )
+    return pipeline
+
+
+def encode_fold(
+    fold_key: str,
+    family: str,
+    encoder_params: dict,
+    target_type: str,
+    numeric,
+    categorical,
+    X_train=None,
+    y_train=None,
+    X_test=None,
+    y_test=None,
+):
+    pipeline = build_pipeline(target_type, numeric, categorical, family)
+    preprocess = clone(pipeline.named_steps["preprocess"]).set_params(**encoder_params)
+    started = time.perf_counter()
+    Xt_train = preprocess.fit_transform(X_train)
+    Xt_test = preprocess.transform(X_test)
+    return {
+        "X_train": Xt_train,
+        "y_train": np.asarray(y_train),
+        "X_test": Xt_test,
+        "y_test": np.asarray(y_test),
+        "encode_s": time.perf_counter() - started,
+    }
+
+
+ENCODE_IGNORE = ["X_train", "y_train", "X_test", "y_test"]
+
+
+def cached_encoder(memory):
+    return memory.cache(encode_fold, ignore=ENCODE_IGNORE)
+
+
+def fit_fold(encoded_ref, candidate: dict, target_type: str, numeric, categorical):
+    try:
+        encoded = encoded_ref.get()
+    except Exception as exc:
+        return {"error": f"Encodage introuvable dans le cache: {exc!r}"}
+
+    try:
+        model = build_candidate(target_type, numeric, categorical, candidate).named_steps["model"]
+        if "n_jobs" in model.get_params():
+            model.set_params(n_jobs=1)
+        started = time.perf_counter()
+        model.fit(encoded["X_train"], encoded["y_train"])
+        fit_s = time.perf_counter() - started
+        started = time.perf_counter()
+        y_pred = model.predict(encoded["X_test"])
+        predict_s = time.perf_counter() - started
+    except Exception as exc:
+        return {"error": repr(exc)}
+
+    metrics = evaluate(encoded["y_test"], y_pred, target_type)
+    metrics.update(
+        fit_s=fit_s,
+        predict_s=predict_s,
+        predict_ms_per_1k_rows=1000 * 1000 * predict_s / max(len(y_pred), 1),
+        encode_s=encoded["encode_s"],
+        train_rows=len(encoded["y_train"]),
+        test_rows=len(y_pred),
+    )
+    return metrics
+
+
+def summarize_candidate(candidate: dict, fold_metrics, scoring: str) -> dict:
+    frame = pd.DataFrame(fold_metrics)
+    row = {
+        "candidate": candidate["id"],
+        "family": candidate["family"],
+        "encoder": candidate["encoder"],
+        "model": candidate["model"],
+        "folds": len(frame),
+        "score": float(frame[scoring].mean()),
+        "score_std": float(frame[scoring].std(ddof=0)),
+    }
+    for column in frame.columns:
+        if column in ("train_rows", "test_rows"):
+            continue
+        row[f"{column}_mean"] = round(float(frame[column].mean()), 6)
+    row["fold_scores"] = [round(float(v), 6) for v in frame[scoring]]
+    return row
+
+
+def rank(rows, scoring: str):
+    reverse = scoring not in LOWER_IS_BETTER
+    ordered = sorted(rows, key=lambda row: row["score"], reverse=reverse)
+    for position, row in enumerate(ordered, start=1):
+        row["rank"] = position
+    return ordered
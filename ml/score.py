@@ -0,0 +1,230 @@
+import argparse
+import json
+
+import duckdb
+import joblib
+import pandas as pd
+
+from train import artifact_dir
+
+
+DEFAULT_DB = "data/analytics.duckdb"
+DEFAULT_TABLE = "mart_flight_features"
+DEFAULT_PREDICTIONS_TABLE = "flight_predictions"
+DEFAULT_ARTIFACTS = "ml/artifacts"
+
+KEY_COLUMNS = [
+    "flight_id",
+    "icao24",
+    "callsign",
+    "flight_type",
+    "airport_icao",
+    "event_hour_utc",
+    "event_day_utc",
+    "route_code",
+]
+
+
+def load_artifacts(artifacts_dir: str):
+    artifacts = artifact_dir(artifacts_dir)
+    model_path = artifacts / "model.joblib"
+    features_path = artifacts / "features.json"
+    if not model_path.exists() or not features_path.exists():
+        raise FileNotFoundError(f"Artefacts manquants dans {artifacts}. Lancez ml/train.py.")
+    with features_path.open("r", encoding="utf-8") as f:
+        feature_cfg = json.load(f)
+    if not feature_cfg.get("model_version"):
+        raise ValueError("features.json sans model_version: reentrainez le modele.")
+    return joblib.load(model_path), feature_cfg
+
+
+def ensure_predictions_table(con, table: str):
+    con.execute(
+        f"""
+        create table if not exists {table} (
+            flight_id varchar not null,
+            model_version varchar not null,
+            icao24 varchar,
+            callsign varchar,
+            flight_type varchar,
+            airport_icao varchar,
+            event_hour_utc timestamp,
+            event_day_utc date,
+            route_code varchar,
+            prediction double,
+            prediction_label varchar,
+            feature_hash ubigint,
+            scored_at timestamp default current_timestamp,
+            primary key (flight_id, model_version)
+        )
+        """
+    )
+    con.execute(f"alter table {table} add column if not exists prediction_label varchar")
+    con.execute(f"alter table {table} add column if not exists feature_hash ubigint")
+
+
+def feature_columns(con, table: str, feature_cfg: dict):
+    available = {row[0] for row in con.execute(f"describe {table}").fetchall()}
+    categorical = feature_cfg.get("categorical_features", [])
+    numeric = feature_cfg.get("numeric_features", [])
+    return [c for c in (categorical + numeric) if c in available]
+
+
+def feature_hash_sql(feature_cols, alias: str = "m") -> str:
+    return "hash({})".format(", ".join(f"{alias}.{c}" for c in feature_cols))
+
+
+def stale_condition(feature_cols) -> str:
+    return f"(p.flight_id is null or p.feature_hash is distinct from {feature_hash_sql(feature_cols)})"
+
+
+def days_to_score(
+    con, table: str, predictions_table: str, model_version: str, feature_cols, start, end
+):
+    where = [stale_condition(feature_cols)]
+    params = [model_version]
+    if start:
+        where.append("m.event_day_utc >= ?")
+        params.append(start)
+    if end:
+        where.append("m.event_day_utc <= ?")
+        params.append(end)
+    return con.execute(
+        f"""
+        select m.event_day_utc, count(*)
+        from {table} m
+        left join {predictions_table} p
+            on p.flight_id = m.flight_id
+           and p.model_version = ?
+        where {' and '.join(where)}
+        group by 1
+        order by 1
+        """,
+        params,
+    ).fetchall()
+
+
+def score_day(
+    con, model, feature_cfg: dict, feature_cols, table: str, predictions_table: str, day
+) -> int:
+    model_version = feature_cfg["model_version"]
+    df = con.execute(
+        f"""
+        select m.*, {feature_hash_sql(feature_cols)} as feature_hash
+        from {table} m
+        left join {predictions_table} p
+            on p.flight_id = m.flight_id
+           and p.model_version = ?
+        where m.event_day_utc = ?
+          and {stale_condition(feature_cols)}
+        """,
+        [model_version, day],
+    ).fetchdf()
+    if df.empty:
+        return 0
+
+    out = df[KEY_COLUMNS + ["feature_hash"]].copy()
+    out["model_version"] = model_version
+    preds = pd.Series(model.predict(df[feature_cols]), index=df.index)
+    out["prediction"] = pd.to_numeric(preds, errors="coerce")
+    if feature_cfg.get("target_type") == "classification":
+        out["prediction_label"] = preds.astype(str)
+    else:
+        out["prediction_label"] = None
+    con.register("scored_batch", out)
+    try:
+        con.execute(
+            f"""
+            insert or replace into {predictions_table} (
+                flight_id, model_version, icao24, callsign, flight_type, airport_icao,
+                event_hour_utc, event_day_utc, route_code, prediction, prediction_label,
+                feature_hash, scored_at
+            )
+            select
+                flight_id, model_version, icao24, callsign, flight_type, airport_icao,
+                event_hour_utc, event_day_utc, route_code, prediction,
+                cast(prediction_label as varchar), feature_hash, current_timestamp
+            from scored_batch
+            """
+        )
+    finally:
+        con.unregister("scored_batch")
+    return len(out)
+
+
+def delete_orphans(con, table: str, predictions_table: str, model_version: str, start, end) -> int:
+    where = ["p.model_version = ?"]
+    params = [model_version]
+    if start:
+        where.append("p.event_day_utc >= ?")
+        params.append(start)
+    if end:
+        where.append("p.event_day_utc <= ?")
+        params.append(end)
+    return con.execute(
+        f"""
+        delete from {predictions_table} p
+        where {' and '.join(where)}
+          and not exists (select 1 from {table} m where m.flight_id = p.flight_id)
+        """,
+        params,
+    ).fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-score flights into flight_predictions")
+    parser.add_argument("--db-path", default=DEFAULT_DB)
+    parser.add_argument("--table", default=DEFAULT_TABLE)
+    parser.add_argument("--predictions-table", default=DEFAULT_PREDICTIONS_TABLE)
+    parser.add_argument("--artifacts-dir", default=DEFAULT_ARTIFACTS)
+    parser.add_argument("--start-day", help="YYYY-MM-DD")
+    parser.add_argument("--end-day", help="YYYY-MM-DD")
+    parser.add_argument(
+        "--rescore",
+        action="store_true",
+        help="Delete existing predictions of this model version before scoring",
+    )
+    args = parser.parse_args()
+
+    model, feature_cfg = load_artifacts(args.artifacts_dir)
+    model_version = feature_cfg["model_version"]
+
+    con = duckdb.connect(args.db_path)
+    try:
+        ensure_predictions_table(con, args.predictions_table)
+        if args.rescore:
+            con.execute(
+                f"delete from {args.predictions_table} where model_version = ?",
+                [model_version],
+            )
+        feature_cols = feature_columns(con, args.table, feature_cfg)
+        if not feature_cols:
+            raise ValueError(f"Aucune feature de features.json dans {args.table}")
+        total = 0
+        for day, _ in days_to_score(
+            con,
+            args.table,
+            args.predictions_table,
+            model_version,
+            feature_cols,
+            args.start_day,
+            args.end_day,
+        ):
+            scored = score_day(
+                con, model, feature_cfg, feature_cols, args.table, args.predictions_table, day
+            )
+            total += scored
+            print("{}: {} vols scores".format(day, scored))
+        removed = delete_orphans(
+            con, args.table, args.predictions_table, model_version, args.start_day, args.end_day
+        )
+        if removed:
+            print("{} predictions supprimees (vols absents de {})".format(removed, args.table))
+    finally:
+        con.close()
+
+    print("Model version {}: {} predictions ecrites".format(model_version, total))
+
+
+if __name__ == "__main__":
+    main()
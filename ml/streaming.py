@@ -0,0 +1,162 @@
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+
+class StreamingSource:
+    def __init__(self, con, table: str, time_col: str, target: str, feature_cols):
+        self.con = con
+        self.table = table
+        self.time_col = time_col
+        self.target = target
+        self.feature_cols = list(feature_cols)
+        self.rows_read = 0
+        self.bytes_read = 0
+
+    def _columns_sql(self) -> str:
+        return ", ".join(self.feature_cols + [self.target])
+
+    def cutoff(self, test_days: int):
+        row = self.con.execute(
+            f"""
+            select max({self.time_col}) - to_days(cast(? as integer))
+            from {self.table}
+            where {self.target} is not null
+            """,
+            [test_days],
+        ).fetchone()
+        if row is None or row[0] is None:
+            raise ValueError(f"Aucune ligne avec {self.target} non nul dans {self.table}")
+        return row[0]
+
+    def count(self, cutoff, train: bool) -> int:
+        op = "<" if train else ">="
+        return self.con.execute(
+            f"""
+            select count(*)
+            from {self.table}
+            where {self.target} is not null
+              and {self.time_col} {op} ?
+            """,
+            [cutoff],
+        ).fetchone()[0]
+
+    def _batches(self, sql: str, params, batch_size: int):
+        reader = self.con.execute(sql, params).fetch_record_batch(batch_size)
+        for batch in reader:
+            self.rows_read += batch.num_rows
+            self.bytes_read += batch.nbytes
+            yield batch.to_pandas()
+
+    def sample_train(self, cutoff, max_rows: int, batch_size: int) -> pd.DataFrame:
+        sql = f"""
+            select *
+            from (
+                select {self._columns_sql()}
+                from {self.table}
+                where {self.target} is not null
+                  and {self.time_col} < ?
+            )
+            using sample reservoir({int(max_rows)} rows) repeatable (42)
+            """
+        frames = list(self._batches(sql, [cutoff], batch_size))
+        if not frames:
+            return pd.DataFrame(columns=self.feature_cols + [self.target])
+        return pd.concat(frames, ignore_index=True)
+
+    def iter_test(self, cutoff, batch_size: int):
+        sql = f"""
+            select {self._columns_sql()}
+            from {self.table}
+            where {self.target} is not null
+              and {self.time_col} >= ?
+            """
+        return self._batches(sql, [cutoff], batch_size)
+
+
+class StreamingMetrics:
+    def __init__(self, target_type: str):
+        self.target_type = target_type
+        self.n = 0
+        self.abs_err = 0.0
+        self.sq_err = 0.0
+        self.sum_y = 0.0
+        self.sum_y2 = 0.0
+        self.correct = 0
+        self.tp = {}
+        self.fp = {}
+        self.fn = {}
+        self.support = {}
+
+    def update(self, y_true, y_pred):
+        y_true = np.asarray(y_true)
+        y_pred = np.asarray(y_pred)
+        self.n += len(y_true)
+        if self.target_type == "classification":
+            self.correct += int((y_true == y_pred).sum())
+            for label in np.union1d(np.unique(y_true), np.unique(y_pred)):
+                true_mask = y_true == label
+                pred_mask = y_pred == label
+                self.tp[label] = self.tp.get(label, 0) + int((true_mask & pred_mask).sum())
+                self.fp[label] = self.fp.get(label, 0) + int((~true_mask & pred_mask).sum())
+                self.fn[label] = self.fn.get(label, 0) + int((true_mask & ~pred_mask).sum())
+                self.support[label] = self.support.get(label, 0) + int(true_mask.sum())
+            return
+        y_true = y_true.astype(float)
+        err = y_true - y_pred.astype(float)
+        self.abs_err += float(np.abs(err).sum())
+        self.sq_err += float((err**2).sum())
+        self.sum_y += float(y_true.sum())
+        self.sum_y2 += float((y_true**2).sum())
+
+    def result(self) -> dict:
+        if self.n == 0:
+            return {}
+        if self.target_type == "classification":
+            weighted_f1 = 0.0
+            for label, support in self.support.items():
+                denom = 2 * self.tp[label] + self.fp[label] + self.fn[label]
+                f1 = 2 * self.tp[label] / denom if denom else 0.0
+                weighted_f1 += f1 * support
+            return {
+                "accuracy": self.correct / self.n,
+                "f1": weighted_f1 / self.n,
+            }
+        total_var = self.sum_y2 - self.sum_y**2 / self.n
+        return {
+            "mae": self.abs_err / self.n,
+            "rmse": (self.sq_err / self.n) ** 0.5,
+            "r2": 1.0 - self.sq_err / total_var if total_var > 0 else 0.0,
+        }
+
+
+class ResourceMonitor:
+    def __init__(self):
+        self.started = None
+        self.stages = {}
+
+    def start(self):
+        pa.default_memory_pool().release_unused()
+        tracemalloc.start()
+        self.started = time.perf_counter()
+
+    def stage(self, name: str, started: float):
+        self.stages[name] = round(time.perf_counter() - started, 3)
+
+    def report(self, source: StreamingSource, train_rows: int) -> dict:
+        elapsed = time.perf_counter() - self.started
+        _, python_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "stages_s": self.stages,
+            "rows_read": source.rows_read,
+            "train_rows": train_rows,
+            "rows_per_s": round(source.rows_read / elapsed, 1) if elapsed else None,
+            "arrow_bytes_read": source.bytes_read,
+            "peak_python_mb": round(python_peak / 2**20, 1),
+            "peak_arrow_mb": round(pa.default_memory_pool().max_memory() / 2**20, 1),
+        }
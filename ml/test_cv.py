@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+from joblib import Memory
+
+from cv import cached_encoder, fit_fold, rolling_origin_folds
+
+
+def hourly_times(days: int) -> pd.Series:
+    return pd.Series(pd.date_range("2026-01-01", periods=days * 24, freq="h", tz="UTC"))
+
+
+def test_folds_do_not_leak():
+    times = hourly_times(30)
+    folds = rolling_origin_folds(times, n_folds=3, fold_days=2)
+    assert len(folds) == 3
+    for fold in folds:
+        test_start = pd.Timestamp(fold["test_start"])
+        test_end = pd.Timestamp(fold["test_end"])
+        train = times.iloc[fold["train_idx"]]
+        test = times.iloc[fold["test_idx"]]
+        assert train.max() <= test_start < test.min()
+        assert test.max() <= test_end
+        assert not set(fold["train_idx"]) & set(fold["test_idx"])
+    assert folds[-1]["test_end"] == times.max().isoformat()
+    starts = [fold["test_start"] for fold in folds]
+    assert starts == sorted(starts)
+
+
+def test_folds_max_train_days():
+    times = hourly_times(30)
+    for fold in rolling_origin_folds(times, n_folds=2, fold_days=1, max_train_days=5):
+        train = times.iloc[fold["train_idx"]]
+        test_start = pd.Timestamp(fold["test_start"])
+        assert train.min() > test_start - pd.Timedelta(days=5)
+        assert len(train) == 5 * 24
+
+
+def test_folds_keep_row_order_unsorted():
+    times = hourly_times(10).sample(frac=1, random_state=3).reset_index(drop=True)
+    fold = rolling_origin_folds(times, n_folds=1, fold_days=2)[0]
+    assert times.iloc[fold["train_idx"]].max() <= pd.Timestamp(fold["test_start"])
+    assert len(fold["train_idx"]) + len(fold["test_idx"]) == len(times)
+
+
+def test_folds_too_short_history():
+    with pytest.raises(ValueError):
+        rolling_origin_folds(hourly_times(2).iloc[:1], n_folds=3, fold_days=1)
+
+
+def test_fit_fold_missing_cache_entry(tmp_path):
+    encode = cached_encoder(Memory(tmp_path, verbose=0))
+    candidate = {"family": "rf", "encoder": {}, "model": {"n_estimators": 5}}
+    X = pd.DataFrame({"distance_km": np.arange(20.0), "airline": ["AFR", "DLH"] * 10})
+    y = pd.Series(np.arange(20.0))
+    call = ("fold-0", "rf", {}, "regression", ["distance_km"], ["airline"])
+    ref = encode.call_and_shelve(*call, X_train=X, y_train=y, X_test=X, y_test=y)
+    metrics = fit_fold(ref, candidate, "regression", ["distance_km"], ["airline"])
+    assert "error" not in metrics
+    assert metrics["test_rows"] == 20
+
+    encode.clear(warn=False)
+    metrics = fit_fold(ref, candidate, "regression", ["distance_km"], ["airline"])
+    assert metrics["error"].startswith("Encodage introuvable")
@@ -0,0 +1,33 @@
+import duckdb
+import pytest
+
+from streaming import StreamingSource
+
+
+@pytest.fixture
+def source():
+    con = duckdb.connect()
+    con.execute(
+        """
+        create table flights as
+        select
+            i,
+            timestamp '2026-01-01 00:00:00' + to_hours(i) as event_hour_utc,
+            case when i % 10 = 0 then null else i * 1.0 end as delay_min
+        from range(100000) t(i)
+        """
+    )
+    return StreamingSource(con, "flights", "event_hour_utc", "delay_min", ["i"])
+
+
+@pytest.mark.parametrize("max_rows", [10, 5000, 20000])
+def test_sample_train_fills_reservoir(source, max_rows):
+    cutoff = source.con.execute(
+        "select timestamp '2026-01-01 00:00:00' + to_hours(10000)"
+    ).fetchone()[0]
+    filtered = source.count(cutoff, train=True)
+    sample = source.sample_train(cutoff, max_rows, batch_size=1000)
+    assert len(sample) == min(max_rows, filtered)
+    assert sample["i"].max() < 10000
+    assert sample["delay_min"].notna().all()
+    assert source.rows_read == len(sample)
@@ -1,5 +1,9 @@
 import argparse
+import datetime as dt
 import json
+import os
+import shutil
+import time
 from pathlib import Path
 
 import duckdb
@@ -7,7 +11,12 @@ import joblib
 import numpy as np
 import pandas as pd
 from sklearn.compose import ColumnTransformer
-from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.ensemble import (
+    HistGradientBoostingClassifier,
+    HistGradientBoostingRegressor,
+    RandomForestClassifier,
+    RandomForestRegressor,
+)
 from sklearn.metrics import (
     accuracy_score,
     f1_score,
@@ -15,15 +24,43 @@ from sklearn.metrics import (
     mean_squared_error,
     r2_score,
 )
-from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder
+from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder
 from sklearn.impute import SimpleImputer
 
+from streaming import ResourceMonitor, StreamingMetrics, StreamingSource
+
 
 DEFAULT_DB = "data/analytics.duckdb"
 DEFAULT_TABLE = "mart_flight_features"
 
+CATEGORICAL_FEATURES = [
+    "flight_type",
+    "airport_icao",
+    "est_departure_airport",
+    "est_arrival_airport",
+    "route_code",
+    "airport_country_code",
+]
+NUMERIC_FEATURES = [
+    "flight_duration_min",
+    "hour_of_day_utc",
+    "day_of_week_utc",
+    "month_utc",
+    "week_of_year_utc",
+    "day_of_year_utc",
+    "temperature_2m",
+    "precipitation",
+    "wind_speed_10m",
+    "cloud_cover",
+    "airport_movements_prev_1h",
+    "airport_movements_prev_3h",
+    "airport_departures_prev_3h",
+    "airport_arrivals_prev_3h",
+    "airport_movements_prev_24h",
+    "route_flights_prev_7d",
+]
+
 
 def load_data(db_path: str, table: str) -> pd.DataFrame:
     con = duckdb.connect(db_path, read_only=True)
@@ -44,11 +81,23 @@ def split_by_time(df: pd.DataFrame, time_col: str, test_days: int):
     train_df = df[df[time_col] < cutoff]
     test_df = df[df[time_col] >= cutoff]
     if train_df.empty or test_df.empty:
-        train_df, test_df = train_test_split(df, test_size=0.2, random_state=42)
+        train_df, test_df = split_ordered(df, time_col)
+    return train_df, test_df
+
+
+def split_ordered(df: pd.DataFrame, time_col: str, test_fraction: float = 0.2):
+    df = df.sort_values(time_col, kind="stable")
+    cutoff = df[time_col].iloc[int(len(df) * (1 - test_fraction))]
+    train_df = df[df[time_col] < cutoff]
+    test_df = df[df[time_col] >= cutoff]
+    if train_df.empty or test_df.empty:
+        raise ValueError(
+            f"Impossible de separer train et test dans le temps: {time_col} n'a qu'une valeur"
+        )
     return train_df, test_df
 
 
-def build_pipeline(target_type: str, numeric_features, categorical_features):
+def build_rf_pipeline(target_type: str, numeric_features, categorical_features):
     cat_pipe = Pipeline(
         steps=[
             ("imputer", SimpleImputer(strategy="most_frequent")),
@@ -78,6 +127,243 @@ def build_pipeline(target_type: str, numeric_features, categorical_features):
     return Pipeline(steps=[("preprocess", preprocessor), ("model", model)])
 
 
+def build_hgb_pipeline(target_type: str, numeric_features, categorical_features):
+    encoder = OrdinalEncoder(
+        handle_unknown="use_encoded_value",
+        unknown_value=-1,
+        encoded_missing_value=-1,
+        max_categories=254,
+    )
+    preprocessor = ColumnTransformer(
+        transformers=[
+            ("cat", encoder, categorical_features),
+            ("num", "passthrough", numeric_features),
+        ]
+    )
+    categorical_mask = [True] * len(categorical_features) + [False] * len(numeric_features)
+
+    if target_type == "classification":
+        model = HistGradientBoostingClassifier(
+            categorical_features=categorical_mask, class_weight="balanced", random_state=42
+        )
+    else:
+        model = HistGradientBoostingRegressor(
+            categorical_features=categorical_mask, random_state=42
+        )
+
+    return Pipeline(steps=[("preprocess", preprocessor), ("model", model)])
+
+
+MODEL_BUILDERS = {
+    "rf": build_rf_pipeline,
+    "hgb": build_hgb_pipeline,
+}
+
+
+def build_pipeline(target_type: str, numeric_features, categorical_features, model: str = "rf"):
+    if model not in MODEL_BUILDERS:
+        raise ValueError(f"Famille de modele inconnue: {model}")
+    return MODEL_BUILDERS[model](target_type, numeric_features, categorical_features)
+
+
+ARTIFACT_POINTER = "current.json"
+KEEP_VERSIONS = 5
+
+
+def artifact_dir(output_dir) -> Path:
+    output_dir = Path(output_dir)
+    pointer = output_dir / ARTIFACT_POINTER
+    if not pointer.exists():
+        return output_dir
+    with pointer.open("r", encoding="utf-8") as f:
+        return output_dir / json.load(f)["path"]
+
+
+def write_json_atomic(path: Path, payload: dict):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def save_artifacts(
+    output_dir: Path,
+    pipeline,
+    metrics: dict,
+    args,
+    family: str,
+    categorical_used,
+    numeric_used,
+    X_sample: pd.DataFrame,
+) -> str:
+    model_version = dt.datetime.now(dt.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    versions_dir = output_dir / "versions"
+    version_dir = versions_dir / model_version
+    tmp_dir = versions_dir / (model_version + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    joblib.dump(pipeline, tmp_dir / "model.joblib")
+    write_json_atomic(tmp_dir / "metrics.json", metrics)
+    write_json_atomic(
+        tmp_dir / "warmup.json",
+        {"rows": json.loads(X_sample.head(1).to_json(orient="records", date_format="iso"))},
+    )
+    write_json_atomic(
+        tmp_dir / "features.json",
+        {
+            "model_version": model_version,
+            "model_family": family,
+            "target": args.target,
+            "target_type": args.target_type,
+            "time_col": args.time_col,
+            "categorical_features": categorical_used,
+            "numeric_features": numeric_used,
+        },
+    )
+    shutil.rmtree(version_dir, ignore_errors=True)
+    os.replace(tmp_dir, version_dir)
+    write_json_atomic(
+        output_dir / ARTIFACT_POINTER,
+        {"model_version": model_version, "path": f"versions/{model_version}"},
+    )
+    stale = sorted(p for p in versions_dir.iterdir() if p.is_dir() and not p.name.endswith(".tmp"))
+    for old in stale[:-KEEP_VERSIONS]:
+        shutil.rmtree(old, ignore_errors=True)
+    return model_version
+
+
+def profile_model(pipeline, X_sample: pd.DataFrame, work_dir: Path) -> dict:
+    work_dir.mkdir(parents=True, exist_ok=True)
+    path = work_dir / "profile.joblib"
+    joblib.dump(pipeline, path)
+    size_bytes = path.stat().st_size
+
+    started = time.perf_counter()
+    loaded = joblib.load(path)
+    load_s = time.perf_counter() - started
+    path.unlink()
+    if X_sample.empty:
+        return {"artifact_size_bytes": size_bytes, "load_s": round(load_s, 4)}
+
+    started = time.perf_counter()
+    loaded.predict(X_sample)
+    batch_s = time.perf_counter() - started
+
+    single = X_sample.head(1)
+    repeats = 20
+    started = time.perf_counter()
+    for _ in range(repeats):
+        loaded.predict(single)
+    single_s = (time.perf_counter() - started) / repeats
+
+    return {
+        "artifact_size_bytes": size_bytes,
+        "load_s": round(load_s, 4),
+        "predict_batch_rows": len(X_sample),
+        "predict_ms_per_row_batch": round(1000 * batch_s / max(len(X_sample), 1), 5),
+        "predict_ms_single_row": round(1000 * single_s, 3),
+    }
+
+
+def available_features(columns, target: str):
+    columns = set(columns).difference([target])
+    categorical_used = [c for c in CATEGORICAL_FEATURES if c in columns]
+    numeric_used = [c for c in NUMERIC_FEATURES if c in columns]
+    return categorical_used, numeric_used
+
+
+def table_columns(con, table: str):
+    return [row[0] for row in con.execute(f"describe select * from {table}").fetchall()]
+
+
+def train_streaming(args, families):
+    monitor = ResourceMonitor()
+    monitor.start()
+    con = duckdb.connect(args.db_path, read_only=True)
+    try:
+        columns = table_columns(con, args.table)
+        if args.target not in columns:
+            raise ValueError(
+                f"Colonne cible introuvable: {args.target}. "
+                "Ajoute-la dans mart_flight_features."
+            )
+        categorical_used, numeric_used = available_features(columns, args.target)
+        feature_cols = categorical_used + numeric_used
+        source = StreamingSource(con, args.table, args.time_col, args.target, feature_cols)
+
+        cutoff = source.cutoff(args.test_days)
+        started = time.perf_counter()
+        train_df = source.sample_train(cutoff, args.max_train_rows, args.batch_size)
+        monitor.stage("load_train_sample", started)
+        if train_df.empty:
+            raise ValueError(f"Aucune ligne d'entrainement avant {cutoff}")
+        train_rows = len(train_df)
+
+        results = []
+        X_profile = None
+        for family in families:
+            started = time.perf_counter()
+            pipeline = build_pipeline(args.target_type, numeric_used, categorical_used, family)
+            pipeline.fit(train_df[feature_cols], train_df[args.target])
+            monitor.stage(f"fit_{family}", started)
+
+            started = time.perf_counter()
+            stream_metrics = StreamingMetrics(args.target_type)
+            for batch in source.iter_test(cutoff, args.batch_size):
+                if X_profile is None:
+                    X_profile = batch[feature_cols].head(1000)
+                stream_metrics.update(batch[args.target], pipeline.predict(batch[feature_cols]))
+            monitor.stage(f"evaluate_{family}", started)
+            results.append((family, pipeline, stream_metrics.result()))
+        del train_df
+    finally:
+        con.close()
+
+    report = monitor.report(source, train_rows)
+    print(
+        "Streaming: {rows_read} lignes lues ({rows_per_s} lignes/s), "
+        "{train_rows} lignes d'entrainement, pic memoire python {peak_python_mb} Mo, "
+        "pic arrow {peak_arrow_mb} Mo, {elapsed_s}s".format(**report)
+    )
+    for _, _, metrics in results:
+        metrics["training_report"] = report
+    if X_profile is None:
+        X_profile = pd.DataFrame(columns=feature_cols)
+    return results, categorical_used, numeric_used, X_profile
+
+
+def train_in_memory(args, families):
+    df = load_data(args.db_path, args.table)
+    if args.target not in df.columns:
+        raise ValueError(
+            f"Colonne cible introuvable: {args.target}. "
+            "Ajoute-la dans mart_flight_features."
+        )
+
+    df = df.dropna(subset=[args.target])
+    train_df, test_df = split_by_time(df, args.time_col, args.test_days)
+
+    categorical_used, numeric_used = available_features(df.columns, args.target)
+    feature_cols = categorical_used + numeric_used
+    X_train = train_df[feature_cols]
+    y_train = train_df[args.target]
+    X_test = test_df[feature_cols]
+    y_test = test_df[args.target]
+
+    results = []
+    for family in families:
+        pipeline = build_pipeline(args.target_type, numeric_used, categorical_used, family)
+        started = time.perf_counter()
+        pipeline.fit(X_train, y_train)
+        fit_s = time.perf_counter() - started
+        y_pred = pipeline.predict(X_test)
+
+        metrics = evaluate(y_test, y_pred, args.target_type)
+        metrics["fit_s"] = round(fit_s, 3)
+        results.append((family, pipeline, metrics))
+    return results, categorical_used, numeric_used, X_test.head(1000)
+
+
 def evaluate(y_true, y_pred, target_type: str):
     if target_type == "classification":
         return {
@@ -104,71 +390,62 @@ def main():
     parser.add_argument("--time-col", default="event_hour_utc")
     parser.add_argument("--test-days", type=int, default=30)
     parser.add_argument("--output-dir", default="ml/artifacts")
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Out-of-core mode: SQL time split, sampled train set, batched evaluation",
+    )
+    parser.add_argument("--batch-size", type=int, default=100_000, help="Arrow batch size (streaming)")
+    parser.add_argument(
+        "--max-train-rows",
+        type=int,
+        default=1_000_000,
+        help="Reservoir sample size for the train set (streaming)",
+    )
+    parser.add_argument(
+        "--model",
+        choices=sorted(MODEL_BUILDERS),
+        default=None,
+        help=(
+            "rf: OneHot + RandomForest (defaut), hgb: ordinal + HistGradientBoosting "
+            "(categories natives, defaut en --streaming)"
+        ),
+    )
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="Also fit and profile the other model families (saved model stays --model)",
+    )
     args = parser.parse_args()
+    if args.model is None:
+        args.model = "hgb" if args.streaming else "rf"
 
-    df = load_data(args.db_path, args.table)
-    if args.target not in df.columns:
-        raise ValueError(
-            f"Colonne cible introuvable: {args.target}. "
-            "Ajoute-la dans mart_flight_features."
-        )
-
-    df = df.dropna(subset=[args.target])
-    train_df, test_df = split_by_time(df, args.time_col, args.test_days)
-
-    categorical_features = [
-        "flight_type",
-        "airport_icao",
-        "est_departure_airport",
-        "est_arrival_airport",
-        "route_code",
-        "airport_country_code",
-    ]
-    numeric_features = [
-        "flight_duration_min",
-        "hour_of_day_utc",
-        "day_of_week_utc",
-        "month_utc",
-        "week_of_year_utc",
-        "day_of_year_utc",
-        "temperature_2m",
-        "precipitation",
-        "wind_speed_10m",
-        "cloud_cover",
-    ]
-
-    categorical_used = [c for c in categorical_features if c in df.columns]
-    numeric_used = [c for c in numeric_features if c in df.columns]
-    feature_cols = categorical_used + numeric_used
-    X_train = train_df[feature_cols]
-    y_train = train_df[args.target]
-    X_test = test_df[feature_cols]
-    y_test = test_df[args.target]
+    families = [args.model]
+    if args.compare:
+        families += [f for f in MODEL_BUILDERS if f != args.model]
+    if args.streaming:
+        results, categorical_used, numeric_used, X_profile = train_streaming(args, families)
+    else:
+        results, categorical_used, numeric_used, X_profile = train_in_memory(args, families)
 
-    pipeline = build_pipeline(args.target_type, numeric_used, categorical_used)
-    pipeline.fit(X_train, y_train)
-    y_pred = pipeline.predict(X_test)
+    output_dir = Path(args.output_dir)
+    comparison = {}
+    for family, candidate, candidate_metrics in results:
+        candidate_metrics["profile"] = profile_model(candidate, X_profile, output_dir / ".profile")
+        comparison[family] = candidate_metrics
+        print(f"[{family}]", candidate_metrics)
+    (output_dir / ".profile").rmdir()
 
-    metrics = evaluate(y_test, y_pred, args.target_type)
+    _, pipeline, metrics = results[0]
+    metrics = dict(metrics, model_family=args.model)
+    if args.compare:
+        metrics["families"] = comparison
 
-    output_dir = Path(args.output_dir)
-    output_dir.mkdir(parents=True, exist_ok=True)
-    joblib.dump(pipeline, output_dir / "model.joblib")
-    with (output_dir / "features.json").open("w", encoding="utf-8") as f:
-        json.dump(
-            {
-                "target": args.target,
-                "target_type": args.target_type,
-                "time_col": args.time_col,
-                "categorical_features": categorical_used,
-                "numeric_features": numeric_used,
-            },
-            f,
-            indent=2,
-        )
-    with (output_dir / "metrics.json").open("w", encoding="utf-8") as f:
-        json.dump(metrics, f, indent=2)
+    model_version = save_artifacts(
+        output_dir, pipeline, metrics, args, args.model, categorical_used, numeric_used, X_profile
+    )
 
+    print("Model version:", model_version)
     print("Metrics:", metrics)
 
 
@@ -0,0 +1,295 @@
+import argparse
+import json
+import random
+import time
+from pathlib import Path
+
+import pandas as pd
+from joblib import Memory, Parallel, delayed, hash as joblib_hash
+from sklearn.model_selection import ParameterGrid
+
+from cv import (
+    build_candidate,
+    cached_encoder,
+    fit_fold,
+    rank,
+    rolling_origin_folds,
+    summarize_candidate,
+)
+from train import (
+    DEFAULT_DB,
+    DEFAULT_TABLE,
+    MODEL_BUILDERS,
+    available_features,
+    load_data,
+    profile_model,
+    save_artifacts,
+    write_json_atomic,
+)
+
+
+SEARCH_SPACE = {
+    "hgb": {
+        "encoder": {"cat__max_categories": [64, 254]},
+        "model": {
+            "learning_rate": [0.05, 0.1],
+            "max_leaf_nodes": [31, 63],
+            "min_samples_leaf": [20, 100],
+            "l2_regularization": [0.0, 1.0],
+        },
+    },
+    "rf": {
+        "encoder": {
+            "cat__onehot__min_frequency": [1, 20],
+            "cat__onehot__max_categories": [None, 100],
+        },
+        "model": {
+            "n_estimators": [100, 200],
+            "max_depth": [None, 20],
+            "min_samples_leaf": [1, 5],
+        },
+    },
+}
+DEFAULT_SCORING = {"regression": "rmse", "classification": "f1"}
+
+
+def load_search_space(path: str | None) -> dict:
+    if not path:
+        return SEARCH_SPACE
+    with open(path, "r", encoding="utf-8") as f:
+        space = json.load(f)
+    unknown = sorted(set(space).difference(MODEL_BUILDERS))
+    if unknown:
+        raise ValueError(f"Familles inconnues dans {path}: {unknown}")
+    return space
+
+
+def build_candidates(space: dict, families, max_candidates: int | None, seed: int):
+    candidates = []
+    for family in families:
+        family_space = space.get(family) or {}
+        for encoder in ParameterGrid(family_space.get("encoder") or {}):
+            for model in ParameterGrid(family_space.get("model") or {}):
+                candidates.append({"family": family, "encoder": encoder, "model": model})
+    if max_candidates and len(candidates) > max_candidates:
+        candidates = random.Random(seed).sample(candidates, max_candidates)
+    for position, candidate in enumerate(candidates):
+        candidate["id"] = "{}-{:03d}".format(candidate["family"], position)
+    return candidates
+
+
+def encoding_key(fold_key: str, candidate: dict):
+    return fold_key, candidate["family"], json.dumps(candidate["encoder"], sort_keys=True)
+
+
+def warm_encodings(memory, df, folds, fold_keys, candidates, args, feature_cols, numeric, categorical):
+    encode = cached_encoder(memory)
+    refs = {}
+    pending = []
+    jobs = []
+    for fold, fold_key in zip(folds, fold_keys):
+        for candidate in candidates:
+            key = encoding_key(fold_key, candidate)
+            if key in refs:
+                continue
+            call = (
+                fold_key, candidate["family"], candidate["encoder"], args.target_type, numeric, categorical
+            )
+            train = df.iloc[fold["train_idx"]]
+            test = df.iloc[fold["test_idx"]]
+            data = {
+                "X_train": train[feature_cols],
+                "y_train": train[args.target],
+                "X_test": test[feature_cols],
+                "y_test": test[args.target],
+            }
+            if encode.check_call_in_cache(*call):
+                refs[key] = encode.call_and_shelve(*call, **data)
+                continue
+            refs[key] = None
+            pending.append(key)
+            jobs.append(delayed(encode.call_and_shelve)(*call, **data))
+    started = time.perf_counter()
+    if jobs:
+        refs.update(zip(pending, Parallel(n_jobs=args.n_jobs)(jobs)))
+    return refs, len(jobs), time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hyperparameter search with rolling-origin time-series CV")
+    parser.add_argument("--db-path", default=DEFAULT_DB)
+    parser.add_argument("--table", default=DEFAULT_TABLE)
+    parser.add_argument("--target", required=True)
+    parser.add_argument("--target-type", choices=["regression", "classification"], default="regression")
+    parser.add_argument("--time-col", default="event_hour_utc")
+    parser.add_argument("--folds", type=int, default=4, help="Rolling-origin folds (test windows)")
+    parser.add_argument("--fold-days", type=int, default=7, help="Days per test window")
+    parser.add_argument("--max-train-days", type=int, default=None, help="Sliding train window (default: expanding)")
+    parser.add_argument("--families", default=",".join(sorted(MODEL_BUILDERS)), help="Comma-separated model families")
+    parser.add_argument("--search-space", default=None, help="JSON file {family: {encoder: {...}, model: {...}}}")
+    parser.add_argument("--max-candidates", type=int, default=None, help="Random subset of the grid")
+    parser.add_argument("--scoring", default=None, help="mae, rmse, r2 (regression) or accuracy, f1")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Parallel worker processes (joblib)")
+    parser.add_argument("--cache-dir", default="ml/.cache", help="joblib.Memory cache of encoded folds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output-dir", default="ml/artifacts")
+    parser.add_argument("--no-save", action="store_true", help="Only write the leaderboard")
+    args = parser.parse_args()
+
+    families = [f.strip() for f in args.families.split(",") if f.strip()]
+    unknown = sorted(set(families).difference(MODEL_BUILDERS))
+    if unknown:
+        raise SystemExit(f"Familles inconnues: {unknown}")
+    scoring = args.scoring or DEFAULT_SCORING[args.target_type]
+
+    df = load_data(args.db_path, args.table)
+    if args.target not in df.columns:
+        raise ValueError(
+            f"Colonne cible introuvable: {args.target}. "
+            "Ajoute-la dans mart_flight_features."
+        )
+    if args.time_col not in df.columns:
+        raise ValueError(f"Colonne temps manquante: {args.time_col}")
+    categorical_used, numeric_used = available_features(df.columns, args.target)
+    feature_cols = categorical_used + numeric_used
+
+    df[args.time_col] = pd.to_datetime(df[args.time_col], utc=True, errors="coerce")
+    df = df.dropna(subset=[args.target, args.time_col])
+    df = df.sort_values(args.time_col, kind="stable").reset_index(drop=True)
+    df = df[feature_cols + [args.target, args.time_col]]
+
+    folds = rolling_origin_folds(df[args.time_col], args.folds, args.fold_days, args.max_train_days)
+    data_key = joblib_hash(df)
+    fold_keys = [
+        joblib_hash((data_key, fold["test_start"], fold["test_end"], args.max_train_days))
+        for fold in folds
+    ]
+    candidates = build_candidates(
+        load_search_space(args.search_space), families, args.max_candidates, args.seed
+    )
+    if not candidates:
+        raise SystemExit("Aucun candidat: espace de recherche vide")
+    memory = Memory(args.cache_dir, mmap_mode="r", verbose=0)
+    print(
+        "Tuning: {} lignes, {} plis, {} candidats, scoring {}".format(
+            len(df), len(folds), len(candidates), scoring
+        )
+    )
+
+    encoded_refs, encoded_now, encode_wall_s = warm_encodings(
+        memory, df, folds, fold_keys, candidates, args, feature_cols, numeric_used, categorical_used
+    )
+    print(
+        "Encodage: {} matrices ({} calculees, {} en cache) en {:.1f}s".format(
+            len(encoded_refs), encoded_now, len(encoded_refs) - encoded_now, encode_wall_s
+        )
+    )
+
+    tasks = [(candidate, fold_idx) for candidate in candidates for fold_idx in range(len(folds))]
+    started = time.perf_counter()
+    results = Parallel(n_jobs=args.n_jobs)(
+        delayed(fit_fold)(
+            encoded_refs[encoding_key(fold_keys[fold_idx], candidate)],
+            candidate,
+            args.target_type,
+            numeric_used,
+            categorical_used,
+        )
+        for candidate, fold_idx in tasks
+    )
+    search_wall_s = time.perf_counter() - started
+
+    per_candidate = {}
+    for (candidate, _), metrics in zip(tasks, results):
+        per_candidate.setdefault(candidate["id"], []).append(metrics)
+    rows = []
+    failed = []
+    for candidate in candidates:
+        fold_metrics = per_candidate[candidate["id"]]
+        errors = [m["error"] for m in fold_metrics if "error" in m]
+        if errors:
+            failed.append({"candidate": candidate["id"], **candidate, "error": errors[0]})
+            continue
+        rows.append(summarize_candidate(candidate, fold_metrics, scoring))
+    if not rows:
+        raise SystemExit("Tous les candidats ont echoue: {}".format(failed[0]["error"]))
+    leaderboard = rank(rows, scoring)
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    write_json_atomic(
+        output_dir / "leaderboard.json",
+        {
+            "target": args.target,
+            "target_type": args.target_type,
+            "scoring": scoring,
+            "rows": len(df),
+            "folds": [
+                {k: fold[k] for k in ("test_start", "test_end")}
+                | {"train_rows": len(fold["train_idx"]), "test_rows": len(fold["test_idx"])}
+                for fold in folds
+            ],
+            "encode_wall_s": round(encode_wall_s, 3),
+            "search_wall_s": round(search_wall_s, 3),
+            "n_jobs": args.n_jobs,
+            "leaderboard": leaderboard,
+            "failed": failed,
+        },
+    )
+    pd.DataFrame(
+        [
+            dict(
+                row,
+                encoder=json.dumps(row["encoder"]),
+                model=json.dumps(row["model"]),
+                fold_scores=json.dumps(row["fold_scores"]),
+            )
+            for row in leaderboard
+        ]
+    ).to_csv(output_dir / "leaderboard.csv", index=False)
+
+    for row in leaderboard[:10]:
+        print(
+            "#{rank} {candidate} {scoring}={score:.4f} (+/- {score_std:.4f}) fit {fit_s_mean:.2f}s "
+            "predict {predict_ms_per_1k_rows_mean:.2f} ms/1k lignes".format(scoring=scoring, **row)
+        )
+    if failed:
+        print("{} candidats en echec (voir leaderboard.json)".format(len(failed)))
+    print("Leaderboard:", output_dir / "leaderboard.json")
+    if args.no_save:
+        return
+
+    best = leaderboard[0]
+    candidate = next(c for c in candidates if c["id"] == best["candidate"])
+    pipeline = build_candidate(args.target_type, numeric_used, categorical_used, candidate)
+    started = time.perf_counter()
+    pipeline.fit(df[feature_cols], df[args.target])
+    fit_s = time.perf_counter() - started
+
+    metrics = {
+        "model_family": candidate["family"],
+        "tuning": True,
+        "scoring": scoring,
+        "cv_score": best["score"],
+        "cv_score_std": best["score_std"],
+        "fit_s": round(fit_s, 3),
+        "params": {"encoder": candidate["encoder"], "model": candidate["model"]},
+        "profile": profile_model(pipeline, df[feature_cols].tail(1000), output_dir / ".profile"),
+    }
+    (output_dir / ".profile").rmdir()
+    model_version = save_artifacts(
+        output_dir,
+        pipeline,
+        metrics,
+        args,
+        candidate["family"],
+        categorical_used,
+        numeric_used,
+        df[feature_cols].tail(1),
+    )
+    print("Meilleur candidat:", best["candidate"], metrics["params"])
+    print("Model version:", model_version)
+
+
+if __name__ == "__main__":
+    main()